@@ -1,15 +1,17 @@
-import os
-from urllib.parse import quote_plus
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 
-from models.database import Base
+from models.database import Base, database_url
 from models.employee import Employee
 from models.engineer import Engineer
 from models.ticket import Ticket
 from models.ticket_comment import TicketComment
 from models.user import User
+from models.ticket_counter import TicketCounter
+from models.ticket_change import TicketChange
+from models.ticket_transition import TicketTransition
+from models.spent_refresh_token import SpentRefreshToken
 
 config = context.config
 
@@ -19,12 +21,9 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 def get_url():
-    mysql_host = os.getenv("MYSQL_HOST", "localhost")
-    mysql_port = os.getenv("MYSQL_PORT", "3306")
-    mysql_user = os.getenv("MYSQL_USER", "root")
-    mysql_password = os.getenv("MYSQL_PASSWORD", "")
-    mysql_db = os.getenv("MYSQL_DB", "app")
-    return f"mysql+pymysql://{mysql_user}:{quote_plus(mysql_password)}@{mysql_host}:{mysql_port}/{mysql_db}"
+    # The app passes its URL in; the alembic CLI falls back to the same
+    # environment-driven settings the app uses.
+    return config.get_main_option("sqlalchemy.url") or database_url()
 
 def run_migrations_offline():
     url = get_url()
@@ -32,6 +31,7 @@ def run_migrations_offline():
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        render_as_batch=url.startswith("sqlite"),
         dialect_opts={"paramstyle": "named"},
     )
     with context.begin_transaction():
@@ -46,7 +46,13 @@ def run_migrations_online():
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite cannot ALTER most column properties in place; batch mode
+        # rebuilds the table instead.
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
         with context.begin_transaction():
             context.run_migrations()
 
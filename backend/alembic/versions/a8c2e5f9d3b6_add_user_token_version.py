@@ -0,0 +1,24 @@
+"""add user token version
+
+Revision ID: a8c2e5f9d3b6
+Revises: f1d7b4e9a2c5
+Create Date: 2024-01-07 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a8c2e5f9d3b6'
+down_revision = 'f1d7b4e9a2c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
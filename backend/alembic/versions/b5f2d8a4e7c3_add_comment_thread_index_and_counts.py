@@ -0,0 +1,34 @@
+"""add comment thread index and ticket comment counts
+
+Revision ID: b5f2d8a4e7c3
+Revises: a8c2e5f9d3b6
+Create Date: 2024-01-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b5f2d8a4e7c3'
+down_revision = 'a8c2e5f9d3b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_ticket_comments_ticket_id_created_at_id', 'ticket_comments', ['ticket_id', 'created_at', 'id'], unique=False)
+    op.add_column('tickets', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('tickets', sa.Column('last_comment_at', sa.DateTime(), nullable=True))
+    # Each correlated subquery is answered from the new index.
+    op.execute(
+        'UPDATE tickets SET '
+        'comment_count = (SELECT COUNT(*) FROM ticket_comments WHERE ticket_comments.ticket_id = tickets.id), '
+        'last_comment_at = (SELECT MAX(created_at) FROM ticket_comments WHERE ticket_comments.ticket_id = tickets.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('tickets') as batch_op:
+        batch_op.drop_column('last_comment_at')
+        batch_op.drop_column('comment_count')
+    op.drop_index('ix_ticket_comments_ticket_id_created_at_id', table_name='ticket_comments')
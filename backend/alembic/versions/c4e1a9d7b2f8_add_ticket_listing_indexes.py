@@ -0,0 +1,33 @@
+"""add ticket listing indexes
+
+Revision ID: c4e1a9d7b2f8
+Revises: b7d9e3f2a1c6
+Create Date: 2024-01-03 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c4e1a9d7b2f8'
+down_revision = 'b7d9e3f2a1c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tickets_created_at_id', 'tickets', ['created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_updated_at_id', 'tickets', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_tickets_status_created_at_id', 'tickets', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_priority_created_at_id', 'tickets', ['priority', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_engineer_id_created_at_id', 'tickets', ['engineer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tickets_employee_id_created_at_id', 'tickets', ['employee_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tickets_employee_id_created_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_engineer_id_created_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_priority_created_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_status_created_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_updated_at_id', table_name='tickets')
+    op.drop_index('ix_tickets_created_at_id', table_name='tickets')
@@ -0,0 +1,41 @@
+"""add ticket transitions
+
+Revision ID: c9a4e1f7b2d8
+Revises: b5f2d8a4e7c3
+Create Date: 2024-01-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c9a4e1f7b2d8'
+down_revision = 'b5f2d8a4e7c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ticket_transitions',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('from_status', sa.String(length=50), nullable=True),
+        sa.Column('to_status', sa.String(length=50), nullable=False),
+        sa.Column('from_engineer_id', sa.Integer(), nullable=True),
+        sa.Column('to_engineer_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Earlier history was never kept. Seed each ticket with its current state
+    # as of its last update so later changes have a starting point. Time spent
+    # in a seeded state is measured from that update, so it can only come out
+    # shorter than it really was.
+    op.execute(
+        'INSERT INTO ticket_transitions (ticket_id, to_status, to_engineer_id, created_at) '
+        'SELECT id, status, engineer_id, updated_at FROM tickets ORDER BY id'
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_transitions')
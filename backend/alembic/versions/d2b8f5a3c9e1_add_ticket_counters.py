@@ -0,0 +1,29 @@
+"""add ticket counters
+
+Revision ID: d2b8f5a3c9e1
+Revises: c4e1a9d7b2f8
+Create Date: 2024-01-04 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd2b8f5a3c9e1'
+down_revision = 'c4e1a9d7b2f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ticket_counters',
+        sa.Column('dimension', sa.String(length=50), nullable=False),
+        sa.Column('bucket', sa.String(length=255), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'bucket'),
+    )
+
+
+def downgrade():
+    op.drop_table('ticket_counters')
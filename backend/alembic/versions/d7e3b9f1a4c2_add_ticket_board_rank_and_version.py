@@ -0,0 +1,51 @@
+"""add ticket board rank and version
+
+Revision ID: d7e3b9f1a4c2
+Revises: c9a4e1f7b2d8
+Create Date: 2024-01-10 00:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd7e3b9f1a4c2'
+down_revision = 'c9a4e1f7b2d8'
+branch_labels = None
+depends_on = None
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BATCH_SIZE = 5000
+
+
+def time_rank(at):
+    # utils.ranking.time_rank as of this revision.
+    value = (at - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+    digits = []
+    for _ in range(11):
+        value, digit = divmod(value, len(DIGITS))
+        digits.append(DIGITS[digit])
+    return ('h' + ''.join(reversed(digits))).rstrip('0')
+
+
+def upgrade():
+    op.add_column('tickets', sa.Column('board_rank', sa.String(length=255), nullable=False, server_default=''))
+    op.add_column('tickets', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    # Columns start in creation order, as the board showed them until now.
+    conn = op.get_bind()
+    tickets = sa.table('tickets', sa.column('id', sa.Integer), sa.column('created_at', sa.DateTime), sa.column('board_rank', sa.String))
+    rows = conn.execute(sa.select(tickets.c.id, tickets.c.created_at)).all()
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(
+            tickets.update().where(tickets.c.id == sa.bindparam('ticket_id')).values(board_rank=sa.bindparam('rank')),
+            [{'ticket_id': id, 'rank': time_rank(created_at)} for id, created_at in rows[start:start + BATCH_SIZE]],
+        )
+    op.create_index('ix_tickets_status_board_rank_id', 'tickets', ['status', 'board_rank', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tickets_status_board_rank_id', table_name='tickets')
+    with op.batch_alter_table('tickets') as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('board_rank')
@@ -0,0 +1,34 @@
+"""add ticket changes
+
+Revision ID: e6a3c8d1f4b7
+Revises: d2b8f5a3c9e1
+Create Date: 2024-01-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e6a3c8d1f4b7'
+down_revision = 'd2b8f5a3c9e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ticket_changes',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_ticket_changes_ticket_id'), 'ticket_changes', ['ticket_id'], unique=False)
+    op.create_index(op.f('ix_ticket_changes_created_at'), 'ticket_changes', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_ticket_changes_created_at'), table_name='ticket_changes')
+    op.drop_index(op.f('ix_ticket_changes_ticket_id'), table_name='ticket_changes')
+    op.drop_table('ticket_changes')
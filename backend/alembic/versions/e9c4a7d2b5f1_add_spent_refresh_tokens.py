@@ -0,0 +1,33 @@
+"""add spent refresh tokens
+
+Revision ID: e9c4a7d2b5f1
+Revises: d7e3b9f1a4c2
+Create Date: 2024-01-12 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e9c4a7d2b5f1'
+down_revision = 'd7e3b9f1a4c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'spent_refresh_tokens',
+        sa.Column('jti', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    op.create_index(op.f('ix_spent_refresh_tokens_user_id'), 'spent_refresh_tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_spent_refresh_tokens_expires_at'), 'spent_refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_spent_refresh_tokens_expires_at'), table_name='spent_refresh_tokens')
+    op.drop_index(op.f('ix_spent_refresh_tokens_user_id'), table_name='spent_refresh_tokens')
+    op.drop_table('spent_refresh_tokens')
@@ -0,0 +1,34 @@
+"""add updated_at to employees and engineers
+
+Revision ID: f1d7b4e9a2c5
+Revises: e6a3c8d1f4b7
+Create Date: 2024-01-06 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+revision = 'f1d7b4e9a2c5'
+down_revision = 'e6a3c8d1f4b7'
+branch_labels = None
+depends_on = None
+
+UPDATED_AT_TYPE = sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
+
+def upgrade():
+    for table in ('employees', 'engineers'):
+        op.add_column(table, sa.Column('updated_at', UPDATED_AT_TYPE, nullable=True))
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=UPDATED_AT_TYPE, nullable=False)
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('engineers', 'employees'):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
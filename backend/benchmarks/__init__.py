@@ -0,0 +1,8 @@
+# Ticket counts per named scale. Kept here, away from the app imports, so the
+# CLI can validate arguments before it points the database settings at the
+# benchmark dataset.
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Account the generator creates for the login scenario.
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
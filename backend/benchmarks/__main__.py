@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from benchmarks import SCALES
+
+# Benchmark harness. Run from backend/:
+#
+#   python -m benchmarks generate --scale 100k
+#   python -m benchmarks run --scale 100k --concurrency 16 --save-baseline
+#   python -m benchmarks run --scale 100k --concurrency 16 --baseline benchmarks/baseline.json
+#   python -m benchmarks run --url http://localhost:8000 --concurrency 64
+#   QUERY_AUDIT=log QUERY_BUDGET=10 python -m benchmarks run --requests 50
+#   python -m benchmarks run --response-cache
+#
+# With the default SQLite backend each run works on a fresh copy of the
+# generated database, so write scenarios never skew the next run. Set
+# DB_BACKEND=mysql (and the usual MYSQL_* variables) to benchmark MySQL; the
+# database is then used in place. With QUERY_AUDIT set (see
+# utils/query_audit.py) an in-process run also fails on any audit finding.
+# The app runs with its own defaults, so the response cache is off unless
+# RESPONSE_CACHE says otherwise; --response-cache additionally reruns the
+# cacheable read scenarios against the in-process memory cache and reports
+# them as "<scenario>+cache" next to the uncached numbers.
+
+DATA_DIR = os.getenv("BENCH_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PERCENTILES = (50, 95, 99)
+
+def dataset_path(scale: str, seed: int) -> str:
+    return os.path.join(DATA_DIR, f"tickets-{scale}-seed{seed}.db")
+
+def configure_environment(sqlite_path: Optional[str]):
+    # Must run before anything imports models.database.
+    os.environ.setdefault("DB_BACKEND", "sqlite")
+    if os.environ["DB_BACKEND"] == "sqlite" and sqlite_path:
+        os.environ["SQLITE_PATH"] = sqlite_path
+    os.environ.setdefault("SEARCH_INDEX_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-search-"), "index.marshal"))
+
+def generate_dataset(scale: str, seed: int, force: bool = False):
+    path = dataset_path(scale, seed)
+    configure_environment(path)
+    if os.environ["DB_BACKEND"] == "sqlite":
+        if os.path.exists(path) and not force:
+            print(f"{path} already exists, pass --force to regenerate")
+            return
+        os.makedirs(DATA_DIR, exist_ok=True)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    from bootstrap import bootstrap
+    from models.database import SessionLocal, engine
+    from benchmarks.datagen import generate
+
+    bootstrap()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = generate(db, scale, seed)
+        print(f"Generated {counts} in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+        # Closing the last SQLite connection checkpoints the WAL into the
+        # main file, which is the only file a run copies.
+        engine.dispose()
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank percentile.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_scenario(client, name: str, scenario, data, requests: int, warmup: int, concurrency: int, seed: int, query_counter) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(index: int, jobs, record: bool):
+        nonlocal errors
+        rng = random.Random(f"{seed}-{name}-{index}")
+        for _ in jobs:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, data, rng)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            if record:
+                latencies.append(time.perf_counter() - started)
+                errors += failed
+
+    warmup_jobs = iter(range(warmup))
+    await asyncio.gather(*(worker(index, warmup_jobs, False) for index in range(concurrency)))
+
+    queries_before = query_counter() if query_counter else None
+    jobs = iter(range(requests))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index, jobs, True) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed if elapsed else 0.0,
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = percentile(latencies, pct) * 1000
+    if query_counter:
+        result["queries_per_request"] = (query_counter() - queries_before) / requests
+    return result
+
+def install_query_counter():
+    # Counts every statement the app sends, background jobs included, so keep
+    # runs short relative to their intervals or expect a little noise.
+    from sqlalchemy import event
+    from models import database
+
+    count = [0]
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        count[0] += 1
+
+    event.listen(database.engine, "before_cursor_execute", on_execute)
+    if database.async_engine is not None:
+        event.listen(database.async_engine.sync_engine, "before_cursor_execute", on_execute)
+    return lambda: count[0]
+
+async def load_dataset(client):
+    from benchmarks.scenarios import Dataset
+
+    stats = (await client.get("/api/stats")).json()
+    return Dataset(
+        employees=max(1, stats["total_employees"]),
+        engineers=max(1, stats["total_engineers"]),
+        tickets=max(1, stats["total_tickets"]),
+    )
+
+async def run_all(client, names: List[str], args, query_counter) -> Dict:
+    from benchmarks.scenarios import SCENARIOS
+
+    data = await load_dataset(client)
+    results = {}
+    for name in names:
+        results[name] = await run_scenario(
+            client, name, SCENARIOS[name], data, args.requests, args.warmup, args.concurrency, args.seed, query_counter
+        )
+        print_result(name, results[name])
+    return results
+
+async def run_cached(client, names: List[str], args, query_counter) -> Dict:
+    from benchmarks.scenarios import CACHED_SCENARIOS, SCENARIOS
+    from utils.response_cache import response_cache, MemoryBackend
+
+    data = await load_dataset(client)
+    results = {}
+    backend = response_cache.backend
+    response_cache.backend = MemoryBackend()
+    try:
+        for name in names:
+            if name not in CACHED_SCENARIOS:
+                continue
+            results[f"{name}+cache"] = await run_scenario(
+                client, name, SCENARIOS[name], data, args.requests, args.warmup, args.concurrency, args.seed, query_counter
+            )
+            print_result(f"{name}+cache", results[f"{name}+cache"])
+    finally:
+        response_cache.backend = backend
+    return results
+
+async def run_in_process(names: List[str], args) -> Tuple[Dict, Dict]:
+    import httpx
+    from utils.search import search_index
+
+    # Worker cold start: importing the app, then its startup handlers up to
+    # the point it would accept requests. Modules a missing dataset's
+    # generation already imported make the import look cheaper.
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    query_counter = install_query_counter()
+    async with main.app.router.lifespan_context(main.app):
+        startup = {"import_ms": (imported - started) * 1000, "startup_ms": (time.perf_counter() - imported) * 1000}
+        print_startup(startup)
+        # Let the search index finish its initial build so it does not compete
+        # with the measured requests.
+        deadline = time.monotonic() + args.warmup_timeout
+        while not search_index.ready and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            results = await run_all(client, names, args, query_counter)
+            if args.response_cache:
+                results.update(await run_cached(client, names, args, query_counter))
+            return results, startup
+
+async def run_over_http(names: List[str], args) -> Dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        return await run_all(client, names, args, None)
+
+def print_startup(startup: Dict):
+    print(f"{'startup':<14} import {startup['import_ms']:>8.1f} ms  startup {startup['startup_ms']:>8.1f} ms")
+
+def print_result(name: str, result: Dict):
+    queries = result.get("queries_per_request")
+    print(
+        f"{name:<14} {result['throughput']:>9.1f} req/s  "
+        f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+        f"errors {result['errors']:>4}  "
+        + (f"queries/req {queries:.2f}" if queries is not None else "")
+    )
+
+def report_query_audit() -> bool:
+    # Findings recorded by QUERY_AUDIT=log|strict during an in-process run.
+    from collections import Counter
+    from utils.query_audit import findings
+
+    if not findings:
+        return False
+    print("\nQuery audit findings:")
+    for (kind, route), count in sorted(Counter((f["kind"], f["route"]) for f in findings).items()):
+        print(f"{kind:<7} {route} x{count}")
+    return True
+
+def compare(results: Dict, startup: Optional[Dict], baseline: Dict, tolerance: float) -> bool:
+    # A scenario regresses when p95 grows or throughput drops by more than the
+    # tolerance, or when it issues more queries per request than before.
+    regressed = False
+    print(f"\nAgainst baseline from {baseline['meta'].get('timestamp', '?')} (tolerance {tolerance:.0%}):")
+    if startup and baseline.get("startup"):
+        # Reported only: a few milliseconds of jitter is a large fraction.
+        changes = {key: startup[key] / baseline["startup"][key] - 1 for key in startup if baseline["startup"].get(key)}
+        print(f"{'startup':<14} " + "  ".join(f"{key} {change:+7.1%}" for key, change in changes.items()))
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<14} no baseline")
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        throughput_change = result["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        problems = []
+        if p95_change > tolerance:
+            problems.append("p95")
+        if throughput_change < -tolerance:
+            problems.append("throughput")
+        if "queries_per_request" in result and "queries_per_request" in base:
+            if result["queries_per_request"] > base["queries_per_request"] + 0.5:
+                problems.append("queries")
+        regressed = regressed or bool(problems)
+        print(
+            f"{name:<14} p95 {p95_change:+7.1%}  throughput {throughput_change:+7.1%}  "
+            + (f"REGRESSION ({', '.join(problems)})" if problems else "ok")
+        )
+    return regressed
+
+def run_benchmarks(args) -> int:
+    from benchmarks.scenarios import SCENARIOS
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+        return 2
+
+    audit_failed = False
+    startup = None
+    if args.url and args.response_cache:
+        print("--response-cache only applies to in-process runs; set RESPONSE_CACHE on the server instead")
+        return 2
+    if args.url:
+        results = asyncio.run(run_over_http(names, args))
+        backend = "remote"
+    else:
+        path = dataset_path(args.scale, args.seed)
+        work_dir = None
+        if os.getenv("DB_BACKEND", "sqlite") == "sqlite":
+            if not os.path.exists(path):
+                generate_dataset(args.scale, args.seed)
+            work_dir = tempfile.mkdtemp(prefix="bench-run-")
+            work_path = os.path.join(work_dir, "run.db")
+            shutil.copyfile(path, work_path)
+            configure_environment(work_path)
+        else:
+            configure_environment(None)
+        try:
+            results, startup = asyncio.run(run_in_process(names, args))
+        finally:
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        backend = os.environ["DB_BACKEND"]
+        audit_failed = report_query_audit()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "scale": None if args.url else args.scale,
+            "seed": args.seed,
+            "target": args.url or "in-process",
+            "backend": backend,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "startup": startup,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 1 if audit_failed else 0
+    regressed = False
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressed = compare(results, startup, baseline, args.tolerance)
+    return 1 if regressed or audit_failed else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="SupportHub load and latency benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="generate a deterministic dataset")
+    gen.add_argument("--scale", choices=SCALES, default="10k")
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--force", action="store_true", help="overwrite an existing dataset")
+
+    run = commands.add_parser("run", help="run scenarios and report latency percentiles")
+    run.add_argument("--scale", choices=SCALES, default="10k")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--scenarios", help="comma-separated subset of scenarios")
+    run.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    run.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--warmup-timeout", type=float, default=600, help="seconds to wait for background indexes")
+    run.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    run.add_argument("--response-cache", action="store_true", help="also run the cacheable scenarios with the memory response cache (in-process only)")
+    run.add_argument("--output", help="also write the report as JSON here")
+    run.add_argument("--baseline", default=DEFAULT_BASELINE)
+    run.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    run.add_argument("--tolerance", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate_dataset(args.scale, args.seed, args.force)
+        return 0
+    return run_benchmarks(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models.employee import Employee
+from models.engineer import Engineer
+from models.ticket import Ticket
+from models.ticket_comment import TicketComment
+from models.ticket_transition import TicketTransition
+from models.user import User
+from seed_data import seed_default_admin
+from benchmarks import SCALES, BENCH_USERNAME, BENCH_PASSWORD
+from utils.security import hash_password
+from utils.stats import reconcile_counters
+from utils.ranking import time_rank
+
+# People scale with the ticket count.
+TICKETS_PER_EMPLOYEE = 20
+TICKETS_PER_ENGINEER = 200
+INSERT_CHUNK = 5000
+
+EPOCH = datetime(2024, 1, 1)
+STATUSES = (["open", "in_progress", "resolved", "closed"], [30, 20, 20, 30])
+PRIORITIES = (["low", "medium", "high"], [30, 50, 20])
+COMMENTS_PER_TICKET = ([0, 1, 2, 3], [40, 30, 20, 10])
+DEPARTMENTS = ["Finance", "HR", "IT", "Legal", "Marketing", "Operations", "Sales", "Support"]
+SPECIALIZATIONS = ["network vpn", "hardware printers", "software licenses", "accounts email", "security", "database"]
+SUBJECTS = ["vpn", "printer", "laptop", "email", "password", "monitor", "license", "wifi", "database", "badge", "phone", "account"]
+PROBLEMS = ["not working", "very slow", "keeps disconnecting", "needs replacement", "access denied", "shows an error", "locked out"]
+FILLER = (
+    "the user reports that it started after the latest update and happens several times a day "
+    "restarting did not help and colleagues on the same floor see similar behaviour"
+).split()
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(FILLER) for _ in range(words))
+
+def chunks(rows: Iterator[Dict], size: int = INSERT_CHUNK) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def employee_rows(count: int, rng: random.Random) -> Iterator[Dict]:
+    for id in range(1, count + 1):
+        created_at = EPOCH + timedelta(minutes=rng.randrange(60 * 24 * 30))
+        yield {
+            "id": id,
+            "name": f"Employee {id}",
+            "email": f"employee{id}@example.com",
+            "department": rng.choice(DEPARTMENTS),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+def engineer_rows(count: int, rng: random.Random) -> Iterator[Dict]:
+    for id in range(1, count + 1):
+        created_at = EPOCH + timedelta(minutes=rng.randrange(60 * 24 * 30))
+        yield {
+            "id": id,
+            "name": f"Engineer {id}",
+            "email": f"engineer{id}@example.com",
+            "specialization": rng.choice(SPECIALIZATIONS),
+            "is_active": rng.random() > 0.05,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+def ticket_and_comment_rows(count: int, employees: int, engineers: int, rng: random.Random):
+    comment_id = 0
+    for id in range(1, count + 1):
+        created_at = EPOCH + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        status = rng.choices(*STATUSES)[0]
+        ticket = {
+            "id": id,
+            "title": f"{rng.choice(SUBJECTS).capitalize()} {rng.choice(PROBLEMS)}",
+            "description": sentence(rng, rng.randint(8, 40)),
+            "status": status,
+            "priority": rng.choices(*PRIORITIES)[0],
+            "employee_id": rng.randint(1, employees),
+            "engineer_id": None if status == "open" and rng.random() < 0.5 else rng.randint(1, engineers),
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(minutes=rng.randrange(60 * 24 * 7)),
+            "board_rank": time_rank(created_at),
+        }
+        comments = []
+        for _ in range(rng.choices(*COMMENTS_PER_TICKET)[0]):
+            comment_id += 1
+            comments.append({
+                "id": comment_id,
+                "ticket_id": id,
+                "engineer_id": ticket["engineer_id"] or rng.randint(1, engineers),
+                "comment": sentence(rng, rng.randint(5, 25)),
+                "created_at": created_at + timedelta(minutes=rng.randrange(60 * 24 * 7)),
+            })
+        ticket["comment_count"] = len(comments)
+        ticket["last_comment_at"] = max((c["created_at"] for c in comments), default=None)
+        yield ticket, comments
+
+# Statuses a ticket passed through on the way to its final one.
+STATUS_PATHS = {
+    "open": ["open"],
+    "in_progress": ["open", "in_progress"],
+    "resolved": ["open", "in_progress", "resolved"],
+    "closed": ["open", "in_progress", "resolved", "closed"],
+}
+
+def transition_rows(ticket: Dict, rng: random.Random) -> List[Dict]:
+    # Created unassigned, assigned while open, then walked through the path
+    # to the final status; the last step lands on updated_at.
+    path = STATUS_PATHS.get(ticket["status"], [ticket["status"]])
+    steps = len(path) - 1 + (ticket["engineer_id"] is not None)
+    span = (ticket["updated_at"] - ticket["created_at"]).total_seconds()
+    offsets = sorted(rng.uniform(0, span) for _ in range(steps - 1)) + [span] if steps else []
+    rows = [{
+        "ticket_id": ticket["id"],
+        "from_status": None,
+        "to_status": path[0],
+        "from_engineer_id": None,
+        "to_engineer_id": None,
+        "created_at": ticket["created_at"],
+    }]
+    status, engineer_id = path[0], None
+    changes = ([("engineer", ticket["engineer_id"])] if ticket["engineer_id"] is not None else []) + [("status", next_status) for next_status in path[1:]]
+    for (kind, value), offset in zip(changes, offsets):
+        next_status, next_engineer_id = (value, engineer_id) if kind == "status" else (status, value)
+        rows.append({
+            "ticket_id": ticket["id"],
+            "from_status": status,
+            "to_status": next_status,
+            "from_engineer_id": engineer_id,
+            "to_engineer_id": next_engineer_id,
+            "created_at": ticket["created_at"] + timedelta(seconds=offset),
+        })
+        status, engineer_id = next_status, next_engineer_id
+    return rows
+
+def generate(db: Session, scale: str, seed: int = 42, log=print) -> Dict[str, int]:
+    # Same scale and seed always produce the same rows, ids included, so runs
+    # against separately generated databases are comparable.
+    rng = random.Random(seed)
+    # A stream of its own, so adding history left the other tables unchanged.
+    transition_rng = random.Random(f"{seed}-transitions")
+    tickets = SCALES[scale]
+    employees = max(1, tickets // TICKETS_PER_EMPLOYEE)
+    engineers = max(1, tickets // TICKETS_PER_ENGINEER)
+
+    for chunk in chunks(employee_rows(employees, rng)):
+        db.execute(insert(Employee), chunk)
+    for chunk in chunks(engineer_rows(engineers, rng)):
+        db.execute(insert(Engineer), chunk)
+    db.commit()
+    log(f"Generated {employees} employees and {engineers} engineers")
+
+    comments = transitions = 0
+    ticket_chunk: List[Dict] = []
+    comment_chunk: List[Dict] = []
+    transition_chunk: List[Dict] = []
+    for ticket, ticket_comments in ticket_and_comment_rows(tickets, employees, engineers, rng):
+        ticket_chunk.append(ticket)
+        comment_chunk.extend(ticket_comments)
+        for row in transition_rows(ticket, transition_rng):
+            transitions += 1
+            row["id"] = transitions
+            transition_chunk.append(row)
+        if len(ticket_chunk) >= INSERT_CHUNK:
+            db.execute(insert(Ticket), ticket_chunk)
+            if comment_chunk:
+                db.execute(insert(TicketComment), comment_chunk)
+            db.execute(insert(TicketTransition), transition_chunk)
+            db.commit()
+            comments += len(comment_chunk)
+            ticket_chunk, comment_chunk, transition_chunk = [], [], []
+            if ticket["id"] % (INSERT_CHUNK * 20) == 0:
+                log(f"  {ticket['id']} / {tickets} tickets")
+    if ticket_chunk:
+        db.execute(insert(Ticket), ticket_chunk)
+    if comment_chunk:
+        db.execute(insert(TicketComment), comment_chunk)
+    if transition_chunk:
+        db.execute(insert(TicketTransition), transition_chunk)
+    comments += len(comment_chunk)
+    db.commit()
+    log(f"Generated {tickets} tickets, {comments} comments and {transitions} transitions")
+
+    db.add(User(username=BENCH_USERNAME, email="bench@example.com", hashed_password=hash_password(BENCH_PASSWORD), is_admin=True))
+    db.commit()
+    seed_default_admin()
+    reconcile_counters(db)
+    return {"employees": employees, "engineers": engineers, "tickets": tickets, "comments": comments, "transitions": transitions}
@@ -0,0 +1,61 @@
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict
+import httpx
+from benchmarks import BENCH_USERNAME, BENCH_PASSWORD
+
+KANBAN_STATUSES = ["open", "in_progress", "resolved", "closed"]
+
+@dataclass
+class Dataset:
+    # Id ranges of the generated data; generated ids are dense from 1.
+    employees: int
+    engineers: int
+    tickets: int
+
+Scenario = Callable[[httpx.AsyncClient, Dataset, random.Random], Awaitable[httpx.Response]]
+
+async def kanban(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    return await client.get("/api/tickets/kanban")
+
+async def list_tickets(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    return await client.get("/api/tickets", params={"limit": 50, "status": rng.choice(KANBAN_STATUSES)})
+
+async def create(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    return await client.post("/api/tickets", json={
+        "title": "Benchmark ticket",
+        "description": "Created by the benchmark suite",
+        "priority": rng.choice(["low", "medium", "high"]),
+        "employee_id": rng.randint(1, data.employees),
+    })
+
+async def status_drag(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    ticket_id = rng.randint(1, data.tickets)
+    return await client.patch(f"/api/tickets/{ticket_id}/status", json={"status": rng.choice(KANBAN_STATUSES)})
+
+async def comment(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    ticket_id = rng.randint(1, data.tickets)
+    return await client.post(f"/api/tickets/{ticket_id}/comments", json={
+        "comment": "Benchmark comment",
+        "engineer_id": rng.randint(1, data.engineers),
+    })
+
+async def login(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    return await client.post("/api/auth/login", json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+
+async def flow(client: httpx.AsyncClient, data: Dataset, rng: random.Random) -> httpx.Response:
+    return await client.get("/api/stats/flow")
+
+SCENARIOS: Dict[str, Scenario] = {
+    "kanban": kanban,
+    "list": list_tickets,
+    "create": create,
+    "status": status_drag,
+    "comment": comment,
+    "login": login,
+    "flow": flow,
+}
+
+# Read scenarios utils/response_cache.py can answer; --response-cache runs
+# them again with it on.
+CACHED_SCENARIOS = ("kanban", "list")
@@ -0,0 +1,71 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Set
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from models.database import advisory_lock, advisory_lock_name, engine, ensure_database_exists, DATABASE_URL, DB_BACKEND
+from seed_data import seed_default_admin
+
+# One-shot database setup for a deploy: create the MySQL database, migrate to
+# head and seed the default admin. Run it once before starting the workers:
+#
+#   python bootstrap.py
+#
+# Workers then only compare the schema revision with head (schema_is_current),
+# a single query, instead of each taking the migration lock on startup.
+
+MIGRATION_LOCK_TIMEOUT = 60
+
+@contextmanager
+def migration_lock(engine, lock_name):
+    # Serialises migrations across workers starting at the same time.
+    with advisory_lock(engine, lock_name, MIGRATION_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            raise RuntimeError("Could not acquire migration lock")
+        yield
+
+def alembic_config() -> Config:
+    alembic_cfg = Config("alembic.ini")
+    alembic_cfg.set_main_option("sqlalchemy.url", DATABASE_URL)
+    return alembic_cfg
+
+def head_revisions() -> Set[str]:
+    # Read from the migration scripts on disk; no database access.
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+def current_revisions(engine) -> Set[str]:
+    try:
+        with engine.connect() as conn:
+            return {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+    except DBAPIError:
+        # No database or no alembic_version table yet: never migrated.
+        return set()
+
+def schema_is_current(engine=engine) -> bool:
+    return current_revisions(engine) == head_revisions()
+
+def run_startup_migrations(engine, lock_name):
+    with migration_lock(engine, lock_name):
+        command.upgrade(alembic_config(), "head")
+
+def migrate_database():
+    run_startup_migrations(engine, advisory_lock_name("migration"))
+
+def bootstrap():
+    if DB_BACKEND != "sqlite":
+        ensure_database_exists()
+    migrate_database()
+    seed_default_admin()
+
+def main() -> int:
+    started = time.perf_counter()
+    bootstrap()
+    print(f"✅ Database bootstrapped in {time.perf_counter() - started:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
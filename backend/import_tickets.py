@@ -0,0 +1,27 @@
+import argparse
+import sys
+from utils.ticket_import import run_import, detect_format, IMPORT_FORMATS, IMPORT_BATCH_SIZE
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import tickets from a CSV or NDJSON file.")
+    parser.add_argument("path", help="file to import; columns/keys follow TicketCreate, plus optional employee_email")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    file_format = args.format or detect_format(args.path)
+    if file_format is None:
+        parser.error("could not infer the format from the file name, pass --format")
+
+    with open(args.path, "rb") as stream:
+        result = run_import(stream, file_format, args.batch_size)
+
+    for error in result["errors"]:
+        print(f"⚠️  Row {error['row']}: {error['error']}")
+    if result["errors_truncated"]:
+        print(f"⚠️  ... {result['failed'] - len(result['errors'])} more rows failed")
+    print(f"✅ Imported {result['imported']} tickets, {result['failed']} rows failed")
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,22 @@
+import asyncio
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from models.database import engine, Base, get_db
-from routers import employees, engineers, tickets, auth
-from alembic import command
-from alembic.config import Config
-from seed_data import seed_default_admin
+from fastapi.responses import PlainTextResponse
+from models.database import engine, async_engine, replicas, Base, get_db
+from routers import employees, engineers, tickets, auth, stats, search
+from bootstrap import bootstrap, schema_is_current
+from utils.stats import reconcile_periodically
+from utils.changes import prune_periodically
+from utils.revocation import refresh_revocations_periodically
+from utils.hashing import shutdown_hash_pool
+from utils.search import search_index_periodically, save_search_snapshot
+from utils.assignment import refresh_workload_periodically
+from utils.ranking import rebalance_periodically
+from utils.metrics import render_metrics
+from utils.instrumentation import MetricsMiddleware, instrument_engine
+from utils.query_audit import QUERY_AUDIT, QueryAuditMiddleware, audit_engine
+from utils.replicas import ReadYourWritesMiddleware
 
 app = FastAPI(title="SupportHub API", version="1.0.0")
 
@@ -37,35 +47,68 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+if QUERY_AUDIT in ("log", "strict"):
+    app.add_middleware(QueryAuditMiddleware)
+    audit_engine(engine)
+    if async_engine is not None:
+        audit_engine(async_engine.sync_engine)
+    for replica in replicas:
+        audit_engine(replica.engine)
+        if replica.async_engine is not None:
+            audit_engine(replica.async_engine.sync_engine)
+# Added last so it wraps CORS and sees every response, preflights included.
+app.add_middleware(MetricsMiddleware)
 
-def run_startup_migrations(engine, database_url, lock_name):
-    with engine.connect() as conn:
-        acquired = conn.execute(
-            text("SELECT GET_LOCK(:lock_name, 60)"),
-            {"lock_name": lock_name},
-        ).scalar()
-        if not acquired:
-            raise RuntimeError("Could not acquire migration lock")
-        try:
-            alembic_cfg = Config("alembic.ini")
-            alembic_cfg.set_main_option("sqlalchemy.url", database_url)
-            command.upgrade(alembic_cfg, "head")
-        finally:
-            conn.execute(
-                text("SELECT RELEASE_LOCK(:lock_name)"),
-                {"lock_name": lock_name},
-            )
+instrument_engine(engine, "sync")
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine, "async")
+for replica in replicas:
+    instrument_engine(replica.engine, f"{replica.name}-sync")
+    if replica.async_engine is not None:
+        instrument_engine(replica.async_engine.sync_engine, f"{replica.name}-async")
+
+# Creating the database, migrating and seeding belong to `python
+# bootstrap.py`, run once per deploy; a worker only checks that the schema is
+# at head, with one query. DB_AUTO_MIGRATE (on by default, for development)
+# lets a worker that finds the schema behind bootstrap it itself, under the
+# migration lock.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
 
 @app.on_event("startup")
 def startup_event():
-    from models.database import DATABASE_URL, MYSQL_DB
-    run_startup_migrations(engine, DATABASE_URL, f"migration_lock_{MYSQL_DB}")
-    seed_default_admin()
+    if schema_is_current():
+        return
+    if not DB_AUTO_MIGRATE:
+        raise RuntimeError("Database schema is not at the latest revision, run `python bootstrap.py` first")
+    bootstrap()
+
+@app.on_event("startup")
+async def start_background_jobs():
+    asyncio.create_task(reconcile_periodically())
+    asyncio.create_task(prune_periodically())
+    asyncio.create_task(refresh_revocations_periodically())
+    asyncio.create_task(search_index_periodically())
+    asyncio.create_task(refresh_workload_periodically())
+    asyncio.create_task(rebalance_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in replicas:
+        if replica.async_engine is not None:
+            await replica.async_engine.dispose()
+    shutdown_hash_pool()
+    save_search_snapshot()
 
 app.include_router(auth.router, prefix="/api", tags=["auth"])
 app.include_router(employees.router, prefix="/api", tags=["employees"])
 app.include_router(engineers.router, prefix="/api", tags=["engineers"])
 app.include_router(tickets.router, prefix="/api", tags=["tickets"])
+app.include_router(stats.router, prefix="/api", tags=["stats"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 
 @app.get("/")
 def read_root():
@@ -73,4 +116,8 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_metrics()
\ No newline at end of file
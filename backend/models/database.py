@@ -1,10 +1,28 @@
+import fcntl
+import itertools
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List
 from urllib.parse import quote_plus
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from utils.metrics import Counter
 import pymysql
 
+# "mysql" (the default) or "sqlite" for single-node deployments and in-process
+# test runs without a database server.
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "supporthub.db")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
 MYSQL_HOST = os.getenv("MYSQL_HOST", "mysql-shared")
 MYSQL_PORT = os.getenv("MYSQL_PORT", "3306")
 MYSQL_USER = os.getenv("MYSQL_USER", "root")
@@ -16,7 +34,37 @@ if not MYSQL_DB:
     app_id_short = APP_ID.replace("-", "")[:8].lower() if APP_ID else ""
     MYSQL_DB = f"app_{app_id_short}" if app_id_short else "app_db"
 
+# Selects the session the API routers get: "true" uses the native asyncio
+# driver, anything else runs the blocking session on the threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+MYSQL_ASYNC_DRIVER = os.getenv("MYSQL_ASYNC_DRIVER", "aiomysql")
+
+# Connection pool, per engine and per worker process. DB_POOL_PRE_PING is
+# "always" (a round trip on every checkout), "idle" (only for connections
+# idle longer than DB_POOL_PING_IDLE seconds, which are the ones the server
+# may have dropped) or "never". Recycling below MySQL's wait_timeout covers
+# most of what the ping would catch.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+DB_POOL_PING_IDLE = float(os.getenv("DB_POOL_PING_IDLE", "30"))
+
+# Read replicas, as comma-separated SQLAlchemy URLs for the blocking driver
+# (the async driver's URL is derived). GET requests read from a replica,
+# picked by DB_REPLICA_SELECTION ("round_robin" or "least_busy", fewest
+# sessions open), except from a client that wrote within the last
+# DB_READ_YOUR_WRITES_SECONDS: those stay on the primary so they see their
+# own change despite replication lag.
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_SELECTION = os.getenv("DB_REPLICA_SELECTION", "round_robin").lower()
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_COOKIE = "db_primary_until"
+READ_METHODS = ("GET", "HEAD")
+
 def ensure_database_exists():
+    # Called by bootstrap.py; importing this module never connects.
     try:
         conn = pymysql.connect(
             host=MYSQL_HOST,
@@ -30,17 +78,230 @@ def ensure_database_exists():
     except Exception as e:
         print(f"Warning: Could not create database: {e}")
 
-ensure_database_exists()
+def database_url(async_driver: bool = False) -> str:
+    if DB_BACKEND == "sqlite":
+        driver = "sqlite+aiosqlite" if async_driver else "sqlite"
+        return f"{driver}:///{SQLITE_PATH}"
+    driver = f"mysql+{MYSQL_ASYNC_DRIVER}" if async_driver else "mysql+pymysql"
+    return f"{driver}://{MYSQL_USER}:{quote_plus(MYSQL_PASSWORD)}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+
+def engine_options() -> dict:
+    pool = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    if DB_BACKEND == "sqlite":
+        return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT}, **pool}
+    return {"pool_recycle": DB_POOL_RECYCLE, "pool_pre_ping": DB_POOL_PRE_PING == "always", **pool}
+
+def ping_idle_connections(engine):
+    # Pass the sync engine. Raising DisconnectionError from checkout makes the
+    # pool discard the connection and hand out a fresh one.
+    @event.listens_for(engine.pool, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in"] = time.monotonic()
+
+    @event.listens_for(engine.pool, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in = connection_record.info.get("checked_in")
+        if checked_in is None or time.monotonic() - checked_in < DB_POOL_PING_IDLE:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception as e:
+            raise DisconnectionError() from e
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a writer commits; NORMAL sync is safe
+    # under WAL and avoids an fsync per transaction. SQLite leaves foreign
+    # keys off unless asked, unlike MySQL.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000}")
+    cursor.close()
+
+def configure_engine(engine):
+    # Pass the sync engine; for an AsyncEngine that is engine.sync_engine.
+    if DB_BACKEND == "sqlite":
+        event.listen(engine, "connect", configure_sqlite_connection)
+    elif DB_POOL_PRE_PING == "idle":
+        ping_idle_connections(engine)
+
+def advisory_lock_name(purpose: str) -> str:
+    return f"{SQLITE_PATH}.{purpose}.lock" if DB_BACKEND == "sqlite" else f"{purpose}_lock_{MYSQL_DB}"
+
+@contextmanager
+def advisory_lock(engine, lock_name: str, timeout: float):
+    # Yields whether the lock was taken within timeout seconds (0 only tries).
+    # MySQL has a named server-side lock; with SQLite every process shares
+    # the host, so an advisory lock on a file next to the database does the
+    # same job.
+    if engine.dialect.name == "sqlite":
+        with open(lock_name, "a") as lock_file:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        yield False
+                        return
+                    time.sleep(0.1)
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return
 
-DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{quote_plus(MYSQL_PASSWORD)}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+    with engine.connect() as conn:
+        acquired = conn.execute(
+            text("SELECT GET_LOCK(:lock_name, :timeout)"),
+            {"lock_name": lock_name, "timeout": timeout},
+        ).scalar()
+        if not acquired:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            conn.execute(
+                text("SELECT RELEASE_LOCK(:lock_name)"),
+                {"lock_name": lock_name},
+            )
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+DATABASE_URL = database_url()
+ASYNC_DATABASE_URL = database_url(async_driver=True)
+
+engine = create_engine(DATABASE_URL, **engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options()) if DB_ASYNC else None
+configure_engine(engine)
+if async_engine is not None:
+    configure_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False) if DB_ASYNC else None
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **engine_options())
+        configure_engine(self.engine)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        if DB_ASYNC:
+            async_url = make_url(url).set(drivername=make_url(ASYNC_DATABASE_URL).drivername)
+            self.async_engine = create_async_engine(async_url, **engine_options())
+            configure_engine(self.async_engine.sync_engine)
+            self.session_factory = async_sessionmaker(self.async_engine, autoflush=False)
+        # Sessions currently open against this replica, for least_busy.
+        self.sessions = 0
+
+    def session(self):
+        return self.session_factory() if DB_ASYNC else ThreadedSession(self.session_factory())
+
+replicas: List[Replica] = [Replica(f"replica-{index}", url) for index, url in enumerate(DB_REPLICA_URLS)]
+replica_lock = threading.Lock()
+replica_turn = itertools.count()
+db_sessions = Counter("db_sessions_total", "Request sessions opened, by target database.")
+
+def pick_replica() -> Replica:
+    with replica_lock:
+        if DB_REPLICA_SELECTION == "least_busy":
+            replica = min(replicas, key=lambda candidate: candidate.sessions)
+        else:
+            replica = replicas[next(replica_turn) % len(replicas)]
+        replica.sessions += 1
+    return replica
+
+def release_replica(replica: Replica):
+    with replica_lock:
+        replica.sessions -= 1
+
+def reads_from_replica(request: Request) -> bool:
+    if not replicas or request.method not in READ_METHODS:
+        return False
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) < time.time()
+    except ValueError:
+        return True
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+class ThreadedSession:
+    # The subset of the AsyncSession API the routers use, backed by a blocking
+    # Session whose calls each run on the threadpool. Lets both stacks serve
+    # the same async handlers.
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kw):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kw)
+
+    async def scalar(self, statement, params=None, **kw):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kw)
+
+    async def scalars(self, statement, params=None, **kw):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kw)
+
+    async def get(self, entity, ident, **kw):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kw)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kw):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kw)
+
+async def get_primary_async_db():
+    db_sessions.inc(target="primary")
+    db = AsyncSessionLocal() if DB_ASYNC else ThreadedSession(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+async def get_async_db(request: Request):
+    # GET handlers read from a replica when there are any; see
+    # DB_REPLICA_URLS. Handlers that cannot tolerate replication lag use
+    # get_primary_async_db.
+    if not reads_from_replica(request):
+        async for db in get_primary_async_db():
+            yield db
+        return
+    replica = pick_replica()
+    db_sessions.inc(target=replica.name)
+    db = replica.session()
+    try:
+        yield db
+    finally:
+        await db.close()
+        release_replica(replica)
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from models.database import Base
+
+class SpentRefreshToken(Base):
+    __tablename__ = "spent_refresh_tokens"
+
+    # A refresh token's jti once it has been traded for a new pair; kept until
+    # the token would have expired anyway.
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
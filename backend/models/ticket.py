@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from models.database import Base
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_updated_at_id", "updated_at", "id"),
+        Index("ix_tickets_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tickets_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_tickets_engineer_id_created_at_id", "engineer_id", "created_at", "id"),
+        Index("ix_tickets_employee_id_created_at_id", "employee_id", "created_at", "id"),
+        Index("ix_tickets_status_board_rank_id", "status", "board_rank", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String(255), nullable=False)
@@ -15,6 +24,19 @@ class Ticket(Base):
     engineer_id = Column(Integer, ForeignKey("engineers.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Maintained by create_ticket_comment so boards can show activity without
+    # querying comments per card.
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_comment_at = Column(DateTime, nullable=True)
+    # Order within the kanban column, see utils/ranking.py.
+    board_rank = Column(String(255), nullable=False, server_default="")
+    # Compare-and-swap: ORM UPDATEs and DELETEs of a ticket match only the
+    # version they loaded and bump it, so a concurrent edit fails with
+    # StaleDataError instead of being overwritten. Bulk updates bump it
+    # themselves.
+    version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
     employee = relationship("Employee", foreign_keys=[employee_id])
     engineer = relationship("Engineer", foreign_keys=[engineer_id])
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from models.database import Base
+
+class TicketChange(Base):
+    __tablename__ = "ticket_changes"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # No foreign key: delete tombstones must outlive the ticket they refer to.
+    ticket_id = Column(Integer, nullable=False, index=True)
+    operation = Column(String(20), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
\ No newline at end of file
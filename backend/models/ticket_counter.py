@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from models.database import Base
+
+class TicketCounter(Base):
+    __tablename__ = "ticket_counters"
+
+    dimension = Column(String(50), primary_key=True)
+    bucket = Column(String(255), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from models.database import Base
+
+class TicketTransition(Base):
+    # Append-only history of a ticket's status and assignee. Each row holds
+    # the state before and after one change; the first row of a ticket has no
+    # "from" state.
+    __tablename__ = "ticket_transitions"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    # No foreign key, like ticket_changes: history is not rewritten when a
+    # ticket is deleted, analytics skip the orphans. Analytics scan the whole
+    # log in id order, so there is no secondary index to maintain on writes.
+    ticket_id = Column(Integer, nullable=False)
+    from_status = Column(String(50), nullable=True)
+    to_status = Column(String(50), nullable=False)
+    from_engineer_id = Column(Integer, nullable=True)
+    to_engineer_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,18 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from models.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import math
+import time
+from models.database import get_async_db
 from models.user import User
-from schemas.user import UserCreate, UserLogin, UserResponse, Token
-from utils.security import hash_password, verify_password, create_access_token
-from dependencies import get_current_user
+from schemas.user import UserCreate, UserLogin, UserResponse, Token, TokenRefresh, TokenData, PasswordChange
+from utils.security import verify_token, user_claims, create_access_token, create_refresh_token, REFRESH_TOKEN
+from utils.hashing import hash_password, verify_password, HashingUnavailable
+from utils.metrics import Counter, Histogram
+from utils.revocation import revoked_tokens, spend_refresh_token
+from utils.throttle import login_throttle
+from dependencies import get_current_user, credentials_exception
 
 router = APIRouter()
 
+login_attempts = Counter("login_attempts_total", "Login attempts by outcome.")
+login_duration = Histogram("login_duration_seconds", "Login request latency by outcome.")
+
+def hashing_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+def issue_tokens(user: User) -> dict:
+    claims = user_claims(user)
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(claims),
+        "token_type": "bearer",
+    }
+
 @router.post("/auth/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await db.scalar(select(User.id).where(
         (User.username == user.username) | (User.email == user.email)
-    ).first()
+    ))
     
     if existing_user:
         raise HTTPException(
@@ -20,7 +45,10 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             detail="Username or email already registered"
         )
     
-    hashed_password = hash_password(user.password)
+    try:
+        hashed_password = await hash_password(user.password)
+    except HashingUnavailable:
+        raise hashing_unavailable()
     db_user = User(
         username=user.username,
         email=user.email,
@@ -29,26 +57,94 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/auth/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == credentials.username).first()
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    started = time.perf_counter()
+    retry_after = login_throttle.retry_after(credentials.username)
+    if retry_after:
+        login_attempts.inc(outcome="throttled")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    
+    user = await db.scalar(select(User).where(User.username == credentials.username))
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    try:
+        valid = user is not None and await verify_password(credentials.password, user.hashed_password)
+    except HashingUnavailable:
+        login_attempts.inc(outcome="unavailable")
+        raise hashing_unavailable()
+    
+    outcome = "success" if valid else "failure"
+    login_attempts.inc(outcome=outcome)
+    login_duration.observe(time.perf_counter() - started, outcome=outcome)
+    
+    if not valid:
+        login_throttle.record_failure(credentials.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token({"sub": str(user.id)})
+    login_throttle.reset(credentials.username)
+    return issue_tokens(user)
+
+@router.post("/auth/refresh", response_model=Token)
+async def refresh(body: TokenRefresh, db: AsyncSession = Depends(get_async_db)):
+    # The one place a token is checked against the database: role and version
+    # are re-read here, so changes reach clients within one access-token lifetime.
+    # Each refresh token works once and is traded for a new one, so a leaked
+    # token stops working as soon as its owner refreshes.
+    payload = verify_token(body.refresh_token, REFRESH_TOKEN)
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception()
+    
+    user = await db.get(User, int(payload["sub"]))
+    if user is None:
+        raise credentials_exception("User not found")
+    if payload.get("ver", 0) != user.token_version:
+        raise credentials_exception("Token has been revoked")
+    if not await spend_refresh_token(db, body.refresh_token, payload):
+        raise credentials_exception("Token has been revoked")
+    
+    tokens = issue_tokens(user)
+    await db.commit()
+    return tokens
+
+@router.put("/auth/password", response_model=Token)
+async def change_password(body: PasswordChange, current_user: TokenData = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(User, current_user.user_id)
+    if user is None:
+        raise credentials_exception("User not found")
+    
+    try:
+        if not await verify_password(body.current_password, user.hashed_password):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Current password is incorrect"
+            )
+        user.hashed_password = await hash_password(body.new_password)
+    except HashingUnavailable:
+        raise hashing_unavailable()
+    # Bumping the version invalidates every token minted before this point.
+    user.token_version += 1
+    await db.commit()
+    await db.refresh(user)
+    revoked_tokens.revoke(user.id, user.token_version)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(user)
 
 @router.get("/auth/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+async def get_current_user_info(current_user: TokenData = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(User, current_user.user_id)
+    if user is None:
+        raise credentials_exception("User not found")
+    return user
\ No newline at end of file
@@ -1,55 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from models.database import get_db
+from models.database import get_async_db
 from models.employee import Employee
+from models.ticket import Ticket
 from schemas.employee import EmployeeCreate, EmployeeUpdate, EmployeeResponse
+from utils.stats import adjust_counters, UNASSIGNED
+from utils.etag import not_modified_response
+from utils.response_cache import response_cache, TICKETS
 
 router = APIRouter()
 
 @router.get("/employees", response_model=List[EmployeeResponse])
-def list_employees(db: Session = Depends(get_db)):
-    employees = db.query(Employee).all()
+async def list_employees(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    version = (await db.execute(select(func.count(Employee.id), func.max(Employee.updated_at)))).one()
+    not_modified = not_modified_response(request, response, *version)
+    if not_modified:
+        return not_modified
+
+    employees = (await db.scalars(select(Employee))).all()
     return employees
 
 @router.post("/employees", response_model=EmployeeResponse)
-def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
-    existing = db.query(Employee).filter(Employee.email == employee.email).first()
+async def create_employee(employee: EmployeeCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(Employee.id).where(Employee.email == employee.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     db_employee = Employee(**employee.dict())
     db.add(db_employee)
-    db.commit()
-    db.refresh(db_employee)
+    await adjust_counters(db, added=[("entity", "employees")])
+    await db.commit()
+    await db.refresh(db_employee)
     return db_employee
 
 @router.get("/employees/{id}", response_model=EmployeeResponse)
-def get_employee(id: int, db: Session = Depends(get_db)):
-    employee = db.query(Employee).filter(Employee.id == id).first()
-    if not employee:
+async def get_employee(id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    updated_at = await db.scalar(select(Employee.updated_at).where(Employee.id == id))
+    if updated_at is None:
         raise HTTPException(status_code=404, detail="Employee not found")
+    not_modified = not_modified_response(request, response, updated_at)
+    if not_modified:
+        return not_modified
+
+    employee = await db.get(Employee, id)
     return employee
 
 @router.put("/employees/{id}", response_model=EmployeeResponse)
-def update_employee(id: int, employee: EmployeeUpdate, db: Session = Depends(get_db)):
-    db_employee = db.query(Employee).filter(Employee.id == id).first()
+async def update_employee(id: int, employee: EmployeeUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_employee = await db.get(Employee, id)
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    for key, value in employee.dict(exclude_unset=True).items():
+    updates = employee.dict(exclude_unset=True)
+    renamed = "name" in updates and updates["name"] != db_employee.name
+    old_department = db_employee.department
+    for key, value in updates.items():
         setattr(db_employee, key, value)
     
-    db.commit()
-    db.refresh(db_employee)
+    # The employee's tickets are counted under their department, so they
+    # move buckets with it, in the same transaction.
+    if (old_department or UNASSIGNED) != (db_employee.department or UNASSIGNED):
+        await db.flush()
+        tickets = await db.scalar(select(func.count(Ticket.id)).where(Ticket.employee_id == id))
+        await adjust_counters(
+            db,
+            removed=[("department", old_department or UNASSIGNED)] * tickets,
+            added=[("department", db_employee.department or UNASSIGNED)] * tickets,
+        )
+    await db.commit()
+    # Ticket payloads carry the employee's name and nothing else.
+    if renamed:
+        await response_cache.invalidate(TICKETS)
+    await db.refresh(db_employee)
     return db_employee
 
 @router.delete("/employees/{id}")
-def delete_employee(id: int, db: Session = Depends(get_db)):
-    db_employee = db.query(Employee).filter(Employee.id == id).first()
+async def delete_employee(id: int, db: AsyncSession = Depends(get_async_db)):
+    db_employee = await db.get(Employee, id)
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    db.delete(db_employee)
-    db.commit()
+    await db.delete(db_employee)
+    await adjust_counters(db, removed=[("entity", "employees")])
+    await db.commit()
+    await response_cache.invalidate(TICKETS)
     return {"message": "Employee deleted successfully"}
\ No newline at end of file
@@ -1,55 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from models.database import get_db
+from models.database import get_async_db
 from models.engineer import Engineer
 from schemas.engineer import EngineerCreate, EngineerUpdate, EngineerResponse
+from utils.stats import adjust_counters
+from utils.etag import not_modified_response
+from utils.response_cache import response_cache, TICKETS
+from utils.assignment import workload
 
 router = APIRouter()
 
 @router.get("/engineers", response_model=List[EngineerResponse])
-def list_engineers(db: Session = Depends(get_db)):
-    engineers = db.query(Engineer).all()
+async def list_engineers(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    version = (await db.execute(select(func.count(Engineer.id), func.max(Engineer.updated_at)))).one()
+    not_modified = not_modified_response(request, response, *version)
+    if not_modified:
+        return not_modified
+
+    engineers = (await db.scalars(select(Engineer))).all()
     return engineers
 
 @router.post("/engineers", response_model=EngineerResponse)
-def create_engineer(engineer: EngineerCreate, db: Session = Depends(get_db)):
-    existing = db.query(Engineer).filter(Engineer.email == engineer.email).first()
+async def create_engineer(engineer: EngineerCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(Engineer.id).where(Engineer.email == engineer.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     db_engineer = Engineer(**engineer.dict())
     db.add(db_engineer)
-    db.commit()
-    db.refresh(db_engineer)
+    await adjust_counters(db, added=[("entity", "engineers")])
+    await db.commit()
+    await db.refresh(db_engineer)
+    workload.engineer_changed(db_engineer.id, db_engineer.specialization, db_engineer.is_active)
     return db_engineer
 
 @router.get("/engineers/{id}", response_model=EngineerResponse)
-def get_engineer(id: int, db: Session = Depends(get_db)):
-    engineer = db.query(Engineer).filter(Engineer.id == id).first()
-    if not engineer:
+async def get_engineer(id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    updated_at = await db.scalar(select(Engineer.updated_at).where(Engineer.id == id))
+    if updated_at is None:
         raise HTTPException(status_code=404, detail="Engineer not found")
+    not_modified = not_modified_response(request, response, updated_at)
+    if not_modified:
+        return not_modified
+
+    engineer = await db.get(Engineer, id)
     return engineer
 
 @router.put("/engineers/{id}", response_model=EngineerResponse)
-def update_engineer(id: int, engineer: EngineerUpdate, db: Session = Depends(get_db)):
-    db_engineer = db.query(Engineer).filter(Engineer.id == id).first()
+async def update_engineer(id: int, engineer: EngineerUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_engineer = await db.get(Engineer, id)
     if not db_engineer:
         raise HTTPException(status_code=404, detail="Engineer not found")
     
-    for key, value in engineer.dict(exclude_unset=True).items():
+    updates = engineer.dict(exclude_unset=True)
+    renamed = "name" in updates and updates["name"] != db_engineer.name
+    for key, value in updates.items():
         setattr(db_engineer, key, value)
     
-    db.commit()
-    db.refresh(db_engineer)
+    await db.commit()
+    # Ticket payloads carry the engineer's name and nothing else.
+    if renamed:
+        await response_cache.invalidate(TICKETS)
+    await db.refresh(db_engineer)
+    workload.engineer_changed(db_engineer.id, db_engineer.specialization, db_engineer.is_active)
     return db_engineer
 
 @router.delete("/engineers/{id}")
-def delete_engineer(id: int, db: Session = Depends(get_db)):
-    db_engineer = db.query(Engineer).filter(Engineer.id == id).first()
+async def delete_engineer(id: int, db: AsyncSession = Depends(get_async_db)):
+    db_engineer = await db.get(Engineer, id)
     if not db_engineer:
         raise HTTPException(status_code=404, detail="Engineer not found")
     
-    db.delete(db_engineer)
-    db.commit()
+    await db.delete(db_engineer)
+    await adjust_counters(db, removed=[("entity", "engineers")])
+    await db.commit()
+    await response_cache.invalidate(TICKETS)
+    workload.engineer_removed(id)
     return {"message": "Engineer deleted successfully"}
\ No newline at end of file
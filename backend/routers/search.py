@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from models.database import get_async_db
+from models.ticket import Ticket
+from schemas.search import SearchResults
+from routers.tickets import ticket_rows_select, ticket_row_to_dict
+from utils.search import search_index
+
+router = APIRouter()
+
+@router.get("/search", response_model=SearchResults)
+async def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not search_index.ready:
+        raise HTTPException(status_code=503, detail="Search index is still loading", headers={"Retry-After": "5"})
+    
+    ranked, total = await run_in_threadpool(search_index.search, q, limit, offset)
+    if not ranked:
+        return {"hits": [], "total": total, "next_offset": None}
+    
+    rows = (await db.execute(ticket_rows_select().where(Ticket.id.in_([id for id, _ in ranked])))).all()
+    tickets = {row.id: ticket_row_to_dict(row) for row in rows}
+    # A ticket deleted since the index last synced is simply skipped.
+    hits = [{"ticket": tickets[id], "score": score} for id, score in ranked if id in tickets]
+    next_offset = offset + limit if offset + limit < total else None
+    return {"hits": hits, "total": total, "next_offset": next_offset}
\ No newline at end of file
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from models.database import get_async_db
+from models.employee import Employee
+from models.ticket_change import TicketChange
+from models.ticket_transition import TicketTransition
+from schemas.stats import StatsResponse, FlowStatsResponse
+from utils.analytics import run_flow_metrics
+from utils.etag import not_modified_response
+from utils.stats import read_counters
+
+router = APIRouter()
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    counters = await read_counters(db)
+    entities = counters.get("entity", {})
+
+    return {
+        "total_tickets": counters.get("ticket", {}).get("total", 0),
+        "total_employees": entities.get("employees", 0),
+        "total_engineers": entities.get("engineers", 0),
+        "by_status": counters.get("status", {}),
+        "by_priority": counters.get("priority", {}),
+        "by_engineer": counters.get("engineer", {}),
+        "by_department": counters.get("department", {}),
+    }
+
+@router.get("/stats/flow", response_model=FlowStatsResponse)
+async def get_flow_stats(
+    request: Request,
+    response: Response,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Transitions, priority edits and deletions (ticket changes) and
+    # department moves are everything the report depends on.
+    version = (await db.execute(select(
+        select(func.max(TicketTransition.id)).scalar_subquery(),
+        select(func.max(TicketChange.id)).scalar_subquery(),
+        select(func.max(Employee.updated_at)).scalar_subquery(),
+    ))).one()
+    not_modified = not_modified_response(request, response, *version)
+    if not_modified:
+        return not_modified
+
+    # Reads the whole log on a worker thread with its own session.
+    return await run_in_threadpool(run_flow_metrics, created_from, created_to)
@@ -1,209 +1,901 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict
-from models.database import get_db
+import asyncio
+import csv
+import io
+import json
+import os
+from types import SimpleNamespace
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, case, func, select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Optional
+from datetime import datetime
+from models.database import get_async_db, get_primary_async_db, SessionLocal
 from models.ticket import Ticket
+from models.employee import Employee
+from models.engineer import Engineer
 from models.ticket_comment import TicketComment
-from schemas.ticket import TicketCreate, TicketUpdate, TicketResponse, TicketAssign, TicketStatusUpdate
-from schemas.ticket_comment import TicketCommentCreate, TicketCommentResponse
+from models.ticket_change import TicketChange
+from schemas.ticket import TicketCreate, TicketUpdate, TicketResponse, TicketAssign, TicketStatusUpdate, TicketPage, TicketChanges, TicketImportResult, TicketBatch, TicketBatchResult, TicketAutoAssignResult
+from schemas.ticket_comment import TicketCommentCreate, TicketCommentResponse, TicketCommentPage
+from utils.pagination import encode_cursor, decode_cursor
+from utils.stats import ticket_buckets, employee_department, adjust_counters
+from utils.events import change_bus, json_default, RESYNC, EVENT_HEARTBEAT_SECONDS
+from utils.changes import record_change, record_changes, settle_cutoff, settled_token_select, UPSERT, DELETE
+from utils.transitions import record_transition, record_transitions
+from utils.etag import not_modified_response
+from utils.serialization import json_response, dumps
+from utils.response_cache import response_cache, TICKETS
+from utils.ranking import time_rank, place_rank
+from utils.ticket_import import run_import, detect_format, IMPORT_FORMATS, IMPORT_BATCH_SIZE
+from utils.assignment import workload, ticket_state, run_workload_refresh, ASSIGN_PRIORITY_WEIGHTS, ACTIVE_STATUSES
 
 router = APIRouter()
 
-@router.get("/tickets", response_model=List[TicketResponse])
-def list_tickets(db: Session = Depends(get_db)):
-    tickets = db.query(Ticket).all()
-    result = []
-    for ticket in tickets:
-        ticket_dict = {
-            "id": ticket.id,
-            "title": ticket.title,
-            "description": ticket.description,
-            "status": ticket.status,
-            "priority": ticket.priority,
-            "employee_id": ticket.employee_id,
-            "engineer_id": ticket.engineer_id,
-            "created_at": ticket.created_at,
-            "updated_at": ticket.updated_at,
-            "employee": {"name": ticket.employee.name} if ticket.employee else None,
-            "engineer": {"name": ticket.engineer.name} if ticket.engineer else None,
+KANBAN_STATUSES = ["open", "in_progress", "resolved", "closed"]
+
+# Batch operation -> the ticket column it sets (None deletes the tickets).
+BATCH_OPERATIONS = {
+    "assign": "engineer_id",
+    "status": "status",
+    "priority": "priority",
+    "delete": None,
+}
+BATCH_MAX_TICKETS = 500
+TICKET_CONFLICT = "Ticket was changed by someone else, reload and try again"
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CSV_COLUMNS = [
+    "id", "title", "description", "status", "priority",
+    "employee_id", "employee_name", "engineer_id", "engineer_name",
+    "created_at", "updated_at",
+]
+
+SORT_COLUMNS = {
+    "created_at": Ticket.created_at,
+    "updated_at": Ticket.updated_at,
+}
+
+def ticket_filters(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    engineer_id: Optional[int] = None,
+    employee_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Dict:
+    return {
+        "status": status,
+        "priority": priority,
+        "engineer_id": engineer_id,
+        "employee_id": employee_id,
+        "created_from": created_from,
+        "created_to": created_to,
+    }
+
+def apply_ticket_filters(query, filters: Dict):
+    if filters["status"] is not None:
+        query = query.filter(Ticket.status == filters["status"])
+    if filters["priority"] is not None:
+        query = query.filter(Ticket.priority == filters["priority"])
+    if filters["engineer_id"] is not None:
+        query = query.filter(Ticket.engineer_id == filters["engineer_id"])
+    if filters["employee_id"] is not None:
+        query = query.filter(Ticket.employee_id == filters["employee_id"])
+    if filters["created_from"] is not None:
+        query = query.filter(Ticket.created_at >= filters["created_from"])
+    if filters["created_to"] is not None:
+        query = query.filter(Ticket.created_at < filters["created_to"])
+    return query
+
+def ticket_rows_select(include_description: bool = True):
+    columns = [Ticket.id, Ticket.title]
+    if include_description:
+        columns.append(Ticket.description)
+    columns += [
+        Ticket.status,
+        Ticket.priority,
+        Ticket.employee_id,
+        Ticket.engineer_id,
+        Ticket.created_at,
+        Ticket.updated_at,
+        Ticket.comment_count,
+        Ticket.last_comment_at,
+        Ticket.version,
+        Employee.name.label("employee_name"),
+        Engineer.name.label("engineer_name"),
+    ]
+    return (
+        select(*columns)
+        .select_from(Ticket)
+        .outerjoin(Employee, Ticket.employee_id == Employee.id)
+        .outerjoin(Engineer, Ticket.engineer_id == Engineer.id)
+    )
+
+def ticket_row_to_dict(row, include_description: bool = True, response_order: bool = False) -> Dict:
+    # The one place a ticket_rows_select() row becomes its JSON shape. Columns
+    # are unpacked by position: named access on a Row costs several times
+    # more, which adds up on a full board. response_order lays the keys out
+    # like TicketResponse, for endpoints that skip model validation but must
+    # stay byte-identical to the validated output; the board lists id first.
+    if include_description:
+        (id, title, description, status, priority, employee_id, engineer_id, created_at, updated_at,
+         comment_count, last_comment_at, version, employee_name, engineer_name) = row[:14]
+    else:
+        (id, title, status, priority, employee_id, engineer_id, created_at, updated_at,
+         comment_count, last_comment_at, version, employee_name, engineer_name) = row[:13]
+    employee = {"name": employee_name} if employee_name is not None else None
+    engineer = {"name": engineer_name} if engineer_name is not None else None
+    if response_order:
+        return {
+            "title": title,
+            "description": description,
+            "status": status,
+            "priority": priority,
+            "employee_id": employee_id,
+            "engineer_id": engineer_id,
+            "id": id,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "employee": employee,
+            "engineer": engineer,
+            "comment_count": comment_count,
+            "last_comment_at": last_comment_at,
+            "version": version,
         }
-        result.append(ticket_dict)
-    return result
+    if include_description:
+        return {
+            "id": id,
+            "title": title,
+            "description": description,
+            "status": status,
+            "priority": priority,
+            "employee_id": employee_id,
+            "engineer_id": engineer_id,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "employee": employee,
+            "engineer": engineer,
+            "comment_count": comment_count,
+            "last_comment_at": last_comment_at,
+            "version": version,
+        }
+    return {
+        "id": id,
+        "title": title,
+        "status": status,
+        "priority": priority,
+        "employee_id": employee_id,
+        "engineer_id": engineer_id,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "employee": employee,
+        "engineer": engineer,
+        "comment_count": comment_count,
+        "last_comment_at": last_comment_at,
+        "version": version,
+    }
+
+def batch_rank(field: Optional[str], value) -> Dict:
+    # Tickets moved to another column go to its end, as with a single move.
+    if field != "status":
+        return {}
+    return {"board_rank": case((Ticket.status != value, time_rank()), else_=Ticket.board_rank)}
+
+async def commit_or_conflict(db: AsyncSession):
+    # Ticket UPDATEs and DELETEs from the ORM match only the version they
+    # loaded; if another writer got there first nothing matches.
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=TICKET_CONFLICT)
+
+async def delete_ticket_comments(db: AsyncSession, ticket_ids: List[int]):
+    # Comments reference their ticket, so they go before it.
+    await db.execute(delete(TicketComment).where(TicketComment.ticket_id.in_(ticket_ids)))
+
+async def fetch_ticket(db: AsyncSession, id: int) -> Optional[Dict]:
+    row = (await db.execute(ticket_rows_select().where(Ticket.id == id))).first()
+    return ticket_row_to_dict(row) if row else None
+
+async def ticket_listing_version(db: AsyncSession):
+    # Ticket payloads embed employee and engineer names, so renames count too.
+    # Each MAX is answered from the end of an index.
+    result = await db.execute(select(
+        select(func.max(TicketChange.id)).scalar_subquery(),
+        select(func.max(Employee.updated_at)).scalar_subquery(),
+        select(func.max(Engineer.updated_at)).scalar_subquery(),
+    ))
+    return result.one()
+
+@router.get("/tickets", response_model=TicketPage)
+async def list_tickets(
+    request: Request,
+    response: Response,
+    filters: Dict = Depends(ticket_filters),
+    sort: str = Query("created_at", pattern="^(created_at|updated_at)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached, cache_key = await response_cache.lookup(request, TICKETS)
+    if cached is not None:
+        return cached
+    not_modified = not_modified_response(request, response, *await ticket_listing_version(db))
+    if not_modified:
+        return not_modified
+
+    sort_column = SORT_COLUMNS[sort]
+    query = apply_ticket_filters(ticket_rows_select(), filters)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        sort_value, last_id = position
+        if order == "desc":
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, Ticket.id < last_id),
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, Ticket.id > last_id),
+            ))
+
+    if order == "desc":
+        query = query.order_by(sort_column.desc(), Ticket.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Ticket.id.asc())
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort), last.id)
+
+    items = [ticket_row_to_dict(row, response_order=True) for row in rows]
+    return await response_cache.store(cache_key, json_response({"items": items, "next_cursor": next_cursor}, response))
+
+def export_comments(db, ticket_ids: List[int]) -> Dict[int, List[Dict]]:
+    comments: Dict[int, List[Dict]] = {}
+    query = (
+        select(TicketComment.id, TicketComment.ticket_id, TicketComment.engineer_id, TicketComment.comment, TicketComment.created_at)
+        .where(TicketComment.ticket_id.in_(ticket_ids))
+        .order_by(TicketComment.ticket_id, TicketComment.id)
+    )
+    for row in db.execute(query):
+        comments.setdefault(row.ticket_id, []).append(row._asdict())
+    return comments
+
+def export_tickets(filters: Dict, file_format: str, include_comments: bool):
+    # Runs on the threadpool with its own sessions: the request session is gone
+    # by the time the body streams. yield_per turns on a server-side cursor, so
+    # only one batch of rows is held at a time. Comments are fetched per batch
+    # over a second connection, since the first is busy streaming.
+    db = SessionLocal()
+    comments_db = SessionLocal() if include_comments else None
+    try:
+        query = apply_ticket_filters(ticket_rows_select(), filters).order_by(Ticket.id)
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if file_format == "ndjson":
+            for rows in result.partitions():
+                comments = export_comments(comments_db, [row.id for row in rows]) if include_comments else {}
+                lines = []
+                for row in rows:
+                    record = ticket_row_to_dict(row)
+                    if include_comments:
+                        record["comments"] = comments.get(row.id, [])
+                    lines.append(dumps(record))
+                lines.append(b"")
+                yield b"\n".join(lines)
+            return
+
+        buffer = io.StringIO()
+        columns = EXPORT_CSV_COLUMNS + (["comments"] if include_comments else [])
+        writer = csv.DictWriter(buffer, columns, extrasaction="ignore")
+        writer.writeheader()
+        for rows in result.partitions():
+            comments = export_comments(comments_db, [row.id for row in rows]) if include_comments else {}
+            for row in rows:
+                record = row._asdict()
+                record["created_at"] = row.created_at.isoformat()
+                record["updated_at"] = row.updated_at.isoformat()
+                if include_comments:
+                    record["comments"] = json.dumps(comments.get(row.id, []), default=json_default)
+                writer.writerow(record)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+        if comments_db is not None:
+            comments_db.close()
 
 @router.get("/tickets/kanban", response_model=Dict)
-def get_kanban_board(db: Session = Depends(get_db)):
-    tickets = db.query(Ticket).all()
-    
-    kanban_data = {
-        "open": [],
-        "in_progress": [],
-        "resolved": [],
-        "closed": []
+async def get_kanban_board(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    include_description: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached, cache_key = await response_cache.lookup(request, TICKETS)
+    if cached is not None:
+        return cached
+    not_modified = not_modified_response(request, response, *await ticket_listing_version(db))
+    if not_modified:
+        return not_modified
+
+    # Read in the same transaction as the board so a client resuming delta sync
+    # from this token cannot miss a change the board did not include.
+    change_token = await db.scalar(settled_token_select()) or 0
+
+    # Rank and count each column over the (status, board_rank, id) index only,
+    # then join the page of ids back to the wide columns and the name lookups.
+    ranked = (
+        select(
+            Ticket.id.label("ranked_id"),
+            Ticket.board_rank.label("board_rank"),
+            func.row_number().over(
+                partition_by=Ticket.status,
+                order_by=(Ticket.board_rank, Ticket.id),
+            ).label("position"),
+            func.count().over(partition_by=Ticket.status).label("column_total"),
+        )
+        .filter(Ticket.status.in_(KANBAN_STATUSES))
+        .subquery()
+    )
+    board_query = (
+        ticket_rows_select(include_description)
+        .add_columns(ranked.c.board_rank, ranked.c.position, ranked.c.column_total)
+        .join(ranked, ranked.c.ranked_id == Ticket.id)
+        .filter(ranked.c.position <= limit)
+        .order_by(Ticket.status, ranked.c.position)
+    )
+    rows = (await db.execute(board_query)).all()
+
+    kanban_data = {status: [] for status in KANBAN_STATUSES}
+    totals = {status: 0 for status in KANBAN_STATUSES}
+    next_cursors = {status: None for status in KANBAN_STATUSES}
+
+    for row in rows:
+        kanban_data[row.status].append(ticket_row_to_dict(row, include_description))
+        totals[row.status] = row.column_total
+        if row.position == limit and row.column_total > limit:
+            next_cursors[row.status] = encode_cursor(row.board_rank, row.id)
+
+    kanban_data["totals"] = totals
+    kanban_data["next_cursors"] = next_cursors
+    kanban_data["change_token"] = change_token
+    return await response_cache.store(cache_key, json_response(kanban_data, response))
+
+@router.get("/tickets/kanban/{status}", response_model=Dict)
+async def get_kanban_column(
+    status: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    include_description: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if status not in KANBAN_STATUSES:
+        raise HTTPException(status_code=404, detail="Unknown kanban column")
+    cached, cache_key = await response_cache.lookup(request, TICKETS)
+    if cached is not None:
+        return cached
+    not_modified = not_modified_response(request, response, *await ticket_listing_version(db))
+    if not_modified:
+        return not_modified
+
+    query = ticket_rows_select(include_description).add_columns(Ticket.board_rank).filter(Ticket.status == status)
+    if cursor:
+        position = decode_cursor(cursor, parse=str)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        board_rank, last_id = position
+        query = query.filter(or_(
+            Ticket.board_rank > board_rank,
+            and_(Ticket.board_rank == board_rank, Ticket.id > last_id),
+        ))
+
+    rows = (await db.execute(query.order_by(Ticket.board_rank, Ticket.id).limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(rows[-1].board_rank, rows[-1].id)
+
+    return await response_cache.store(cache_key, json_response({
+        "items": [ticket_row_to_dict(row, include_description) for row in rows],
+        "next_cursor": next_cursor,
+    }, response))
+
+@router.get("/tickets/export")
+async def export_ticket_history(
+    filters: Dict = Depends(ticket_filters),
+    file_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    include_comments: bool = False,
+):
+    media_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_tickets(filters, file_format, include_comments),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tickets.{file_format}"'},
+    )
+
+@router.get("/tickets/stream")
+async def stream_ticket_changes(request: Request):
+    subscription = change_bus.subscribe()
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is RESYNC:
+                    # This client fell behind its buffer; it must refetch the board.
+                    yield "event: resync\ndata: {}\n\n"
+                    break
+                yield f"data: {message}\n\n"
+        finally:
+            change_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/tickets/changes", response_model=TicketChanges)
+async def get_ticket_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    # A lagging replica could commit a change below a token already handed
+    # out, past the settle window, and the client would never see it.
+    db: AsyncSession = Depends(get_primary_async_db),
+):
+    oldest, newest = (await db.execute(select(func.min(TicketChange.id), func.max(TicketChange.id)))).one()
+    if oldest is not None and since + 1 < oldest:
+        return {"changes": [], "deleted": [], "token": newest, "reset": True}
+
+    rows = (await db.execute(
+        select(TicketChange.id, TicketChange.ticket_id, TicketChange.operation, TicketChange.created_at)
+        .where(TicketChange.id > since)
+        .order_by(TicketChange.id)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest_operation = {}
+    for row in rows:
+        latest_operation[row.ticket_id] = row.operation
+
+    # The token stops at the first change still inside the settle window.
+    # Past it, a full page only means more once the token has moved; otherwise
+    # the client would re-read the same page until it settles, so it is told
+    # when to come back instead.
+    token = since
+    retry_after = None
+    cutoff = settle_cutoff()
+    for row in rows:
+        if row.created_at > cutoff:
+            retry_after = (row.created_at - cutoff).total_seconds()
+            break
+        token = row.id
+    has_more = has_more and token > since
+
+    upserted_ids = [ticket_id for ticket_id, operation in latest_operation.items() if operation == UPSERT]
+    changed = []
+    if upserted_ids:
+        changed = (await db.execute(
+            ticket_rows_select().where(Ticket.id.in_(upserted_ids)).order_by(Ticket.id)
+        )).all()
+
+    found_ids = {row.id for row in changed}
+    deleted = sorted(
+        ticket_id for ticket_id, operation in latest_operation.items()
+        if operation == DELETE or ticket_id not in found_ids
+    )
+
+    return {
+        "changes": [ticket_row_to_dict(row) for row in changed],
+        "deleted": deleted,
+        "token": token,
+        "has_more": has_more,
+        "retry_after": retry_after,
     }
+
+@router.post("/tickets", response_model=TicketResponse)
+async def create_ticket(ticket: TicketCreate, auto_assign: bool = False, db: AsyncSession = Depends(get_async_db)):
+    db_ticket = Ticket(**ticket.dict(), board_rank=time_rank())
+    booking = None
+    if auto_assign and db_ticket.engineer_id is None:
+        booking = workload.place(f"{ticket.title} {ticket.description}", ticket.priority, ticket.status)
+        db_ticket.engineer_id = booking.engineer_id if booking else None
+    try:
+        db.add(db_ticket)
+        await db.flush()
+        ticket_id = db_ticket.id
+        department = await employee_department(db, db_ticket.employee_id)
+        await adjust_counters(db, added=ticket_buckets(db_ticket, department))
+        record_change(db, ticket_id)
+        state = ticket_state(db_ticket)
+        record_transition(db, ticket_id, None, state)
+        await db.commit()
+    except BaseException:  # a cancelled request never commits either
+        if booking is not None:
+            workload.release(booking)
+        raise
+    await response_cache.invalidate(TICKETS)
+    if booking is not None:
+        workload.confirm(booking)
+    else:
+        workload.ticket_changed(None, state)
     
-    for ticket in tickets:
-        ticket_dict = {
-            "id": ticket.id,
-            "title": ticket.title,
-            "description": ticket.description,
-            "status": ticket.status,
-            "priority": ticket.priority,
-            "employee_id": ticket.employee_id,
-            "engineer_id": ticket.engineer_id,
-            "created_at": ticket.created_at.isoformat() if ticket.created_at else None,
-            "updated_at": ticket.updated_at.isoformat() if ticket.updated_at else None,
-            "employee": {"name": ticket.employee.name} if ticket.employee else None,
-            "engineer": {"name": ticket.engineer.name} if ticket.engineer else None,
-        }
-        
-        status = ticket.status
-        if status in kanban_data:
-            kanban_data[status].append(ticket_dict)
+    result = await fetch_ticket(db, ticket_id)
+    change_bus.publish("ticket.created", {"ticket": result})
+    return result
+
+@router.post("/tickets/import", response_model=TicketImportResult)
+async def import_tickets(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format"),
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=5000),
+):
+    file_format = file_format or detect_format(file.filename, file.content_type)
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format, expected one of: {', '.join(IMPORT_FORMATS)}")
     
-    return kanban_data
+    # The upload is spooled to disk by the server and parsed row by row on a
+    # worker thread, committing one batch at a time.
+    result = await run_in_threadpool(run_import, file.file, file_format, batch_size)
+    if result["imported"]:
+        await response_cache.invalidate(TICKETS)
+        await run_in_threadpool(run_workload_refresh)
+        change_bus.publish("tickets.imported", {"imported": result["imported"]})
+    return result
 
-@router.post("/tickets", response_model=TicketResponse)
-def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
-    db_ticket = Ticket(**ticket.dict())
-    db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+@router.post("/tickets/batch", response_model=TicketBatchResult)
+async def batch_update_tickets(batch: TicketBatch, db: AsyncSession = Depends(get_async_db)):
+    if batch.operation not in BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown operation, expected one of: {', '.join(BATCH_OPERATIONS)}")
+    ids = list(dict.fromkeys(batch.ids))
+    if not ids or len(ids) > BATCH_MAX_TICKETS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {BATCH_MAX_TICKETS} ticket ids are required")
+    field = BATCH_OPERATIONS[batch.operation]
+    value = getattr(batch, field) if field else None
+    if field and value is None:
+        raise HTTPException(status_code=400, detail=f"{field} is required for {batch.operation}")
+    if field == "engineer_id" and await db.get(Engineer, value) is None:
+        raise HTTPException(status_code=404, detail="Engineer not found")
+    
+    # Lock the rows up front so the counter deltas below match what the
+    # UPDATE/DELETE actually changes.
+    before_query = (
+        select(Ticket.id, Ticket.status, Ticket.priority, Ticket.engineer_id, Employee.department)
+        .select_from(Ticket)
+        .outerjoin(Employee, Ticket.employee_id == Employee.id)
+        .where(Ticket.id.in_(ids))
+        .with_for_update(of=Ticket)
+    )
+    rows = (await db.execute(before_query)).all()
+    found = [row.id for row in rows]
+    
+    removed, added, states = [], [], []
+    for row in rows:
+        removed += ticket_buckets(row, row.department)
+        after = None
+        if field:
+            values = row._asdict()
+            values[field] = value
+            after = SimpleNamespace(**values)
+            added += ticket_buckets(after, row.department)
+        states.append((row.id, ticket_state(row), ticket_state(after) if after else None))
     
+    if found:
+        if field:
+            await db.execute(
+                update(Ticket).where(Ticket.id.in_(found)).values({field: value, "version": Ticket.version + 1, **batch_rank(field, value)})
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            await delete_ticket_comments(db, found)
+            await db.execute(
+                delete(Ticket).where(Ticket.id.in_(found))
+                .execution_options(synchronize_session=False)
+            )
+        await adjust_counters(db, removed, added)
+        await record_changes(db, found, UPSERT if field else DELETE)
+        if field:
+            await record_transitions(db, states)
+        await db.commit()
+        await response_cache.invalidate(TICKETS)
+        for _, before_state, after_state in states:
+            workload.ticket_changed(before_state, after_state)
+    
+    if field:
+        updated = (await db.execute(ticket_rows_select().where(Ticket.id.in_(found)))).all()
+        for row in updated:
+            change_bus.publish("ticket.updated", {"ticket": ticket_row_to_dict(row)})
+    else:
+        for ticket_id in found:
+            change_bus.publish("ticket.deleted", {"ticket_id": ticket_id})
+    
+    found_ids = set(found)
+    outcome = "updated" if field else "deleted"
     return {
-        "id": db_ticket.id,
-        "title": db_ticket.title,
-        "description": db_ticket.description,
-        "status": db_ticket.status,
-        "priority": db_ticket.priority,
-        "employee_id": db_ticket.employee_id,
-        "engineer_id": db_ticket.engineer_id,
-        "created_at": db_ticket.created_at,
-        "updated_at": db_ticket.updated_at,
-        "employee": {"name": db_ticket.employee.name} if db_ticket.employee else None,
-        "engineer": {"name": db_ticket.engineer.name} if db_ticket.engineer else None,
+        "results": [{"id": id, "result": outcome if id in found_ids else "not_found"} for id in ids],
+        "succeeded": len(found),
+        "failed": len(ids) - len(found),
     }
 
+@router.post("/tickets/auto-assign", response_model=TicketAutoAssignResult)
+async def auto_assign_tickets(limit: int = Query(BATCH_MAX_TICKETS, ge=1, le=BATCH_MAX_TICKETS), db: AsyncSession = Depends(get_async_db)):
+    # Heaviest priority first, then oldest, so limited capacity goes where it
+    # matters most.
+    weight = case(ASSIGN_PRIORITY_WEIGHTS, value=Ticket.priority, else_=1)
+    query = (
+        select(Ticket.id, Ticket.title, Ticket.description, Ticket.status, Ticket.priority, Ticket.engineer_id, Employee.department)
+        .select_from(Ticket)
+        .outerjoin(Employee, Ticket.employee_id == Employee.id)
+        .where(Ticket.engineer_id.is_(None), Ticket.status.in_(ACTIVE_STATUSES))
+        .order_by(weight.desc(), Ticket.created_at, Ticket.id)
+        .limit(limit)
+        .with_for_update(of=Ticket)
+    )
+    rows = (await db.execute(query)).all()
+    
+    by_engineer: Dict[int, List[int]] = {}
+    removed, added, assignments, transitions, bookings = [], [], [], [], []
+    try:
+        for row in rows:
+            booking = workload.place(f"{row.title} {row.description}", row.priority, row.status)
+            if booking is None:
+                # Every engineer is at the cap; the rest stay unassigned.
+                break
+            bookings.append(booking)
+            engineer_id = booking.engineer_id
+            by_engineer.setdefault(engineer_id, []).append(row.id)
+            removed += ticket_buckets(row, row.department)
+            added += ticket_buckets(SimpleNamespace(status=row.status, priority=row.priority, engineer_id=engineer_id), row.department)
+            assignments.append({"ticket_id": row.id, "engineer_id": engineer_id})
+            transitions.append((row.id, ticket_state(row), (engineer_id, row.status, row.priority)))
+        
+        if assignments:
+            for engineer_id, ticket_ids in by_engineer.items():
+                await db.execute(
+                    update(Ticket).where(Ticket.id.in_(ticket_ids)).values(engineer_id=engineer_id, version=Ticket.version + 1)
+                    .execution_options(synchronize_session=False)
+                )
+            await adjust_counters(db, removed, added)
+            assigned_ids = [assignment["ticket_id"] for assignment in assignments]
+            await record_changes(db, assigned_ids)
+            await record_transitions(db, transitions)
+            await db.commit()
+    except BaseException:  # a cancelled request never commits either
+        for booking in bookings:
+            workload.release(booking)
+        raise
+    for booking in bookings:
+        workload.confirm(booking)
+    
+    if assignments:
+        await response_cache.invalidate(TICKETS)
+        
+        for row in (await db.execute(ticket_rows_select().where(Ticket.id.in_(assigned_ids)))).all():
+            change_bus.publish("ticket.updated", {"ticket": ticket_row_to_dict(row)})
+    
+    return {"assignments": assignments, "assigned": len(assignments), "skipped": len(rows) - len(assignments)}
+
 @router.get("/tickets/{id}", response_model=TicketResponse)
-def get_ticket(id: int, db: Session = Depends(get_db)):
-    ticket = db.query(Ticket).filter(Ticket.id == id).first()
-    if not ticket:
+async def get_ticket(id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    version_query = (
+        select(
+            select(func.max(TicketChange.id)).where(TicketChange.ticket_id == id).scalar_subquery(),
+            Employee.updated_at,
+            Engineer.updated_at,
+        )
+        .select_from(Ticket)
+        .outerjoin(Employee, Ticket.employee_id == Employee.id)
+        .outerjoin(Engineer, Ticket.engineer_id == Engineer.id)
+        .where(Ticket.id == id)
+    )
+    version = (await db.execute(version_query)).first()
+    if version is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    
-    return {
-        "id": ticket.id,
-        "title": ticket.title,
-        "description": ticket.description,
-        "status": ticket.status,
-        "priority": ticket.priority,
-        "employee_id": ticket.employee_id,
-        "engineer_id": ticket.engineer_id,
-        "created_at": ticket.created_at,
-        "updated_at": ticket.updated_at,
-        "employee": {"name": ticket.employee.name} if ticket.employee else None,
-        "engineer": {"name": ticket.engineer.name} if ticket.engineer else None,
-    }
+    not_modified = not_modified_response(request, response, *version)
+    if not_modified:
+        return not_modified
+
+    return await fetch_ticket(db, id)
 
 @router.put("/tickets/{id}", response_model=TicketResponse)
-def update_ticket(id: int, ticket: TicketUpdate, db: Session = Depends(get_db)):
-    db_ticket = db.query(Ticket).filter(Ticket.id == id).first()
+async def update_ticket(id: int, ticket: TicketUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_ticket = await db.get(Ticket, id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
+    department = await employee_department(db, db_ticket.employee_id)
+    before = ticket_buckets(db_ticket, department)
+    before_state = ticket_state(db_ticket)
     for key, value in ticket.dict(exclude_unset=True).items():
         setattr(db_ticket, key, value)
+    after_state = ticket_state(db_ticket)
+    await adjust_counters(db, before, ticket_buckets(db_ticket, department))
+    record_change(db, id)
+    record_transition(db, id, before_state, after_state)
     
-    db.commit()
-    db.refresh(db_ticket)
+    await commit_or_conflict(db)
+    await response_cache.invalidate(TICKETS)
+    workload.ticket_changed(before_state, after_state)
     
-    return {
-        "id": db_ticket.id,
-        "title": db_ticket.title,
-        "description": db_ticket.description,
-        "status": db_ticket.status,
-        "priority": db_ticket.priority,
-        "employee_id": db_ticket.employee_id,
-        "engineer_id": db_ticket.engineer_id,
-        "created_at": db_ticket.created_at,
-        "updated_at": db_ticket.updated_at,
-        "employee": {"name": db_ticket.employee.name} if db_ticket.employee else None,
-        "engineer": {"name": db_ticket.engineer.name} if db_ticket.engineer else None,
-    }
+    result = await fetch_ticket(db, id)
+    change_bus.publish("ticket.updated", {"ticket": result})
+    return result
 
 @router.delete("/tickets/{id}")
-def delete_ticket(id: int, db: Session = Depends(get_db)):
-    db_ticket = db.query(Ticket).filter(Ticket.id == id).first()
+async def delete_ticket(id: int, db: AsyncSession = Depends(get_async_db)):
+    db_ticket = await db.get(Ticket, id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
-    db.delete(db_ticket)
-    db.commit()
+    department = await employee_department(db, db_ticket.employee_id)
+    await adjust_counters(db, removed=ticket_buckets(db_ticket, department))
+    record_change(db, id, DELETE)
+    before_state = ticket_state(db_ticket)
+    await delete_ticket_comments(db, [id])
+    await db.delete(db_ticket)
+    await commit_or_conflict(db)
+    await response_cache.invalidate(TICKETS)
+    workload.ticket_changed(before_state, None)
+    change_bus.publish("ticket.deleted", {"ticket_id": id})
     return {"message": "Ticket deleted successfully"}
 
 @router.post("/tickets/{id}/assign", response_model=TicketResponse)
-def assign_ticket(id: int, assignment: TicketAssign, db: Session = Depends(get_db)):
-    db_ticket = db.query(Ticket).filter(Ticket.id == id).first()
+async def assign_ticket(id: int, assignment: TicketAssign, db: AsyncSession = Depends(get_async_db)):
+    db_ticket = await db.get(Ticket, id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
+    department = await employee_department(db, db_ticket.employee_id)
+    before = ticket_buckets(db_ticket, department)
+    before_state = ticket_state(db_ticket)
     db_ticket.engineer_id = assignment.engineer_id
-    db.commit()
-    db.refresh(db_ticket)
+    after_state = ticket_state(db_ticket)
+    await adjust_counters(db, before, ticket_buckets(db_ticket, department))
+    record_change(db, id)
+    record_transition(db, id, before_state, after_state)
+    await commit_or_conflict(db)
+    await response_cache.invalidate(TICKETS)
+    workload.ticket_changed(before_state, after_state)
     
-    return {
-        "id": db_ticket.id,
-        "title": db_ticket.title,
-        "description": db_ticket.description,
-        "status": db_ticket.status,
-        "priority": db_ticket.priority,
-        "employee_id": db_ticket.employee_id,
-        "engineer_id": db_ticket.engineer_id,
-        "created_at": db_ticket.created_at,
-        "updated_at": db_ticket.updated_at,
-        "employee": {"name": db_ticket.employee.name} if db_ticket.employee else None,
-        "engineer": {"name": db_ticket.engineer.name} if db_ticket.engineer else None,
-    }
+    result = await fetch_ticket(db, id)
+    change_bus.publish("ticket.updated", {"ticket": result})
+    return result
 
 @router.patch("/tickets/{id}/status", response_model=TicketResponse)
-def update_ticket_status(id: int, status_update: TicketStatusUpdate, db: Session = Depends(get_db)):
-    db_ticket = db.query(Ticket).filter(Ticket.id == id).first()
+async def update_ticket_status(id: int, status_update: TicketStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    # No row lock: the write below only matches the version read here, so
+    # concurrent drags of one card cannot both win, and drags of different
+    # cards never wait on each other.
+    db_ticket = await db.get(Ticket, id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
+    if status_update.version is not None and status_update.version != db_ticket.version:
+        raise HTTPException(status_code=409, detail=TICKET_CONFLICT)
     
+    department = await employee_department(db, db_ticket.employee_id)
+    before = ticket_buckets(db_ticket, department)
+    before_state = ticket_state(db_ticket)
+    if status_update.before_id is not None or status_update.after_id is not None:
+        db_ticket.board_rank = await place_rank(db, id, status_update.status, status_update.before_id, status_update.after_id)
+    elif status_update.status != db_ticket.status:
+        db_ticket.board_rank = time_rank()
     db_ticket.status = status_update.status
-    db.commit()
-    db.refresh(db_ticket)
+    after_state = ticket_state(db_ticket)
+    await adjust_counters(db, before, ticket_buckets(db_ticket, department))
+    record_change(db, id)
+    record_transition(db, id, before_state, after_state)
+    await commit_or_conflict(db)
+    await response_cache.invalidate(TICKETS)
+    workload.ticket_changed(before_state, after_state)
     
-    return {
-        "id": db_ticket.id,
-        "title": db_ticket.title,
-        "description": db_ticket.description,
-        "status": db_ticket.status,
-        "priority": db_ticket.priority,
-        "employee_id": db_ticket.employee_id,
-        "engineer_id": db_ticket.engineer_id,
-        "created_at": db_ticket.created_at,
-        "updated_at": db_ticket.updated_at,
-        "employee": {"name": db_ticket.employee.name} if db_ticket.employee else None,
-        "engineer": {"name": db_ticket.engineer.name} if db_ticket.engineer else None,
-    }
+    result = await fetch_ticket(db, id)
+    change_bus.publish("ticket.updated", {"ticket": result})
+    return result
 
-@router.get("/tickets/{id}/comments", response_model=List[TicketCommentResponse])
-def get_ticket_comments(id: int, db: Session = Depends(get_db)):
-    comments = db.query(TicketComment).filter(TicketComment.ticket_id == id).all()
-    return comments
+@router.get("/tickets/{id}/comments", response_model=TicketCommentPage)
+async def get_ticket_comments(
+    id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Comments are append-only and counted on the ticket in the same
+    # transaction, so the ticket row alone identifies the thread.
+    version = (await db.execute(
+        select(Ticket.comment_count, Ticket.last_comment_at).where(Ticket.id == id)
+    )).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    not_modified = not_modified_response(request, response, *version)
+    if not_modified:
+        return not_modified
+
+    # Oldest first, served from ix_ticket_comments_ticket_id_created_at_id.
+    query = select(TicketComment).where(TicketComment.ticket_id == id)
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        created_at, last_id = position
+        query = query.where(or_(
+            TicketComment.created_at > created_at,
+            and_(TicketComment.created_at == created_at, TicketComment.id > last_id),
+        ))
+
+    comments = (await db.scalars(query.order_by(TicketComment.created_at, TicketComment.id).limit(limit + 1))).all()
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1].created_at, comments[-1].id)
+    return {"items": comments, "next_cursor": next_cursor}
 
 @router.post("/tickets/{id}/comments", response_model=TicketCommentResponse)
-def create_ticket_comment(id: int, comment: TicketCommentCreate, db: Session = Depends(get_db)):
-    ticket = db.query(Ticket).filter(Ticket.id == id).first()
-    if not ticket:
+async def create_ticket_comment(id: int, comment: TicketCommentCreate, db: AsyncSession = Depends(get_async_db)):
+    created_at = datetime.utcnow()
+    # Bumping the counts doubles as the existence check. updated_at is kept
+    # as is: a comment is activity, not an edit to the ticket.
+    counted = await db.execute(
+        update(Ticket)
+        .where(Ticket.id == id)
+        .values(comment_count=Ticket.comment_count + 1, last_comment_at=created_at, updated_at=Ticket.updated_at)
+    )
+    if counted.rowcount == 0:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Ticket not found")
-    
+
     db_comment = TicketComment(
         ticket_id=id,
         engineer_id=comment.engineer_id,
-        comment=comment.comment
+        comment=comment.comment,
+        created_at=created_at,
     )
     db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+    # Comments are part of the ticket's searchable text.
+    record_change(db, id)
+    await db.commit()
+    await response_cache.invalidate(TICKETS)
+    await db.refresh(db_comment)
+    change_bus.publish("comment.created", {
+        "ticket_id": id,
+        "comment": {
+            "id": db_comment.id,
+            "ticket_id": db_comment.ticket_id,
+            "engineer_id": db_comment.engineer_id,
+            "comment": db_comment.comment,
+            "created_at": db_comment.created_at,
+        },
+    })
     return db_comment
\ No newline at end of file
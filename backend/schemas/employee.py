@@ -16,6 +16,7 @@ class EmployeeUpdate(EmployeeBase):
 class EmployeeResponse(EmployeeBase):
     id: int
     created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
\ No newline at end of file
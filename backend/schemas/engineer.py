@@ -17,6 +17,7 @@ class EngineerUpdate(EngineerBase):
 class EngineerResponse(EngineerBase):
     id: int
     created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from schemas.ticket import TicketResponse
+
+class SearchHit(BaseModel):
+    ticket: TicketResponse
+    score: float
+
+class SearchResults(BaseModel):
+    hits: List[SearchHit]
+    total: int
+    next_offset: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class StatsResponse(BaseModel):
+    total_tickets: int
+    total_employees: int
+    total_engineers: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_engineer: Dict[str, int]
+    by_department: Dict[str, int]
+
+class DurationStats(BaseModel):
+    # Durations are in seconds.
+    count: int
+    mean: float
+    p50: float
+    p75: float
+    p90: float
+    p95: float
+
+class FlowGroup(BaseModel):
+    time_in_status: Dict[str, DurationStats]
+    cycle_time: Optional[DurationStats] = None
+    lead_time: Optional[DurationStats] = None
+
+class FlowStatsResponse(BaseModel):
+    tickets: int
+    transitions: int
+    overall: FlowGroup
+    by_engineer: Dict[str, FlowGroup]
+    by_priority: Dict[str, FlowGroup]
+    by_department: Dict[str, FlowGroup]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class TicketBase(BaseModel):
     title: str
@@ -26,12 +26,70 @@ class TicketResponse(TicketBase):
     updated_at: datetime
     employee: Optional[dict] = None
     engineer: Optional[dict] = None
+    comment_count: int = 0
+    last_comment_at: Optional[datetime] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
 
+class TicketPage(BaseModel):
+    items: List[TicketResponse]
+    next_cursor: Optional[str] = None
+
+class TicketChanges(BaseModel):
+    changes: List[TicketResponse]
+    deleted: List[int]
+    token: int
+    has_more: bool = False
+    reset: bool = False
+    # Seconds until the changes past the token settle; poll again then.
+    retry_after: Optional[float] = None
+
+class TicketImportError(BaseModel):
+    row: int
+    error: str
+
+class TicketImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[TicketImportError]
+    errors_truncated: bool = False
+
+class TicketBatch(BaseModel):
+    ids: List[int]
+    operation: str
+    engineer_id: Optional[int] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+
+class TicketBatchItem(BaseModel):
+    id: int
+    result: str
+
+class TicketBatchResult(BaseModel):
+    results: List[TicketBatchItem]
+    succeeded: int
+    failed: int
+
+class TicketAutoAssignment(BaseModel):
+    ticket_id: int
+    engineer_id: int
+
+class TicketAutoAssignResult(BaseModel):
+    assignments: List[TicketAutoAssignment]
+    assigned: int
+    skipped: int
+
 class TicketAssign(BaseModel):
     engineer_id: int
 
 class TicketStatusUpdate(BaseModel):
-    status: str
\ No newline at end of file
+    status: str
+    # The version the client last saw; the update fails with 409 if the
+    # ticket has changed since. Omitted, only concurrent writes conflict.
+    version: Optional[int] = None
+    # The cards the ticket is dropped between in the target column. Neither
+    # keeps its place, or puts it at the end of a new column.
+    before_id: Optional[int] = None
+    after_id: Optional[int] = None
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class TicketCommentBase(BaseModel):
     comment: str
@@ -14,4 +15,8 @@ class TicketCommentResponse(TicketCommentBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TicketCommentPage(BaseModel):
+    items: List[TicketCommentResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -21,9 +21,19 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
-    user_id: Optional[int] = None
\ No newline at end of file
+    user_id: int
+    is_admin: bool = False
+    token_version: int = 0
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="supporthub-test-"), "test.db"))
+os.environ.setdefault("SEARCH_INDEX_PATH", os.path.join(tempfile.mkdtemp(prefix="supporthub-search-"), "index.marshal"))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+import main
+from models.database import SessionLocal
+from models.ticket_change import TicketChange
+from utils.changes import CHANGES_SETTLE_SECONDS, UPSERT
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+def add_changes(count: int, created_at: datetime):
+    db = SessionLocal()
+    try:
+        db.execute(insert(TicketChange), [
+            {"ticket_id": 1_000_000 + index, "operation": UPSERT, "created_at": created_at}
+            for index in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def empty_log():
+    db = SessionLocal()
+    db.execute(delete(TicketChange))
+    db.commit()
+    db.close()
+
+def test_unsettled_burst_does_not_report_more(client):
+    add_changes(1, datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS + 60))
+    since = client.get("/api/tickets/changes").json()["token"]
+    add_changes(25, datetime.utcnow())
+
+    body = client.get("/api/tickets/changes", params={"since": since, "limit": 10}).json()
+    assert body["token"] == since
+    assert body["has_more"] is False
+    assert 0 < body["retry_after"] <= CHANGES_SETTLE_SECONDS
+
+def test_settled_burst_pages_forward(client):
+    settled = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS + 60)
+    add_changes(1, settled)
+    since = client.get("/api/tickets/changes").json()["token"]
+    add_changes(25, settled)
+
+    pages = 0
+    while True:
+        body = client.get("/api/tickets/changes", params={"since": since, "limit": 10}).json()
+        pages += 1
+        if not body["has_more"]:
+            break
+        assert body["token"] > since
+        since = body["token"]
+    assert pages == 3
+    assert body["retry_after"] is None
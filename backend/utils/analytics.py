@@ -0,0 +1,238 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.database import SessionLocal
+from models.employee import Employee
+from models.ticket import Ticket
+from models.ticket_transition import TicketTransition
+from utils.changes import settle_cutoff
+from utils.stats import UNASSIGNED
+
+# Flow analytics over the transition log: how long tickets sit in each status,
+# cycle time (first in_progress to the first resolved/closed after it) and
+# lead time (created to first resolved/closed), as percentiles per engineer,
+# priority and department. Rows are loaded into NumPy columns and everything
+# after that is array arithmetic; Python only loops over groups.
+#
+# A stint is a run of transitions that leaves the status unchanged, so
+# reassignments do not split it, and only finished stints are measured. A
+# stint belongs to whoever held the ticket when it started; cycle and lead
+# time to whoever held it when it was done. Priority and department are the
+# ticket's current ones.
+
+DONE_STATUSES = ("resolved", "closed")
+IN_PROGRESS = "in_progress"
+PERCENTILES = (50, 75, 90, 95)
+FETCH_CHUNK = 50_000
+
+# Column kinds for fetch_columns. NumPy picks the narrowest string width
+# itself; timestamps arrive as strings (SQLite) or datetimes (MySQL).
+INT, STR, TIME = "int64", "str", "datetime64[us]"
+
+def to_array(values, kind: str) -> np.ndarray:
+    if kind == INT:
+        return np.array(values, dtype=np.int64)
+    array = np.array(values)
+    return array.astype(kind) if kind == TIME else array
+
+def fetch_columns(db: Session, query, kinds: List[str]) -> List[np.ndarray]:
+    # Reads straight off the DB-API cursor, chunk by chunk, transposing each
+    # chunk into arrays: building Row objects and running result processors
+    # cost several times the fetch itself. The statement is rendered with its
+    # few literals inline, so it needs no parameters; exec_driver_sql still
+    # fires engine events, so metrics and the query audit see it.
+    connection = db.connection()
+    sql = str(query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    columns: List[List[np.ndarray]] = [[] for _ in kinds]
+    result = connection.exec_driver_sql(sql)
+    try:
+        while True:
+            rows = result.cursor.fetchmany(FETCH_CHUNK)
+            if not rows:
+                break
+            for parts, values, kind in zip(columns, zip(*rows), kinds):
+                parts.append(to_array(values, kind))
+    finally:
+        result.close()
+    return [
+        np.concatenate(parts) if parts else np.array([], dtype="U1" if kind == STR else kind)
+        for parts, kind in zip(columns, kinds)
+    ]
+
+def seconds(timestamps: np.ndarray) -> np.ndarray:
+    return timestamps.astype("datetime64[us]").astype(np.int64) / 1e6
+
+class TransitionLog:
+    # The log is append-only, so its columns are kept in memory and each
+    # report only reads the rows added since the last one. Rows newer than
+    # the changes settle window are re-read every time instead of being kept:
+    # a transaction holding a lower id may not have committed yet.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.settled_id = 0
+        self.columns = [np.array([], dtype=np.int64), np.array([], dtype=np.int32), np.array([], dtype=np.int64), np.array([], dtype=np.float64)]
+        self.status_labels: List[str] = []
+        self.status_codes: Dict[str, int] = {}
+
+    def encode_statuses(self, statuses: np.ndarray) -> np.ndarray:
+        labels, inverse = np.unique(statuses, return_inverse=True)
+        codes = np.array([self.status_codes.setdefault(str(label), len(self.status_codes)) for label in labels], dtype=np.int32)
+        self.status_labels = list(self.status_codes)
+        return codes[inverse.reshape(-1)] if len(labels) else np.array([], dtype=np.int32)
+
+    def read(self, db: Session) -> Tuple[List[np.ndarray], List[str]]:
+        # Returns (ticket_id, status code, engineer id or 0, seconds) columns
+        # in id order, and the labels of the status codes.
+        query = select(
+            TicketTransition.id,
+            TicketTransition.ticket_id,
+            TicketTransition.to_status,
+            func.coalesce(TicketTransition.to_engineer_id, 0),
+            TicketTransition.created_at,
+        ).where(TicketTransition.id > self.settled_id).order_by(TicketTransition.id)
+        with self.lock:
+            ids, ticket, status, engineer, at = fetch_columns(db, query, [INT, INT, STR, INT, TIME])
+            tail = [ticket, self.encode_statuses(status), engineer, seconds(at)]
+            cutoff = seconds(np.array([settle_cutoff()], dtype=TIME))[0]
+            unsettled = np.flatnonzero(tail[3] >= cutoff)
+            settled = unsettled[0] if len(unsettled) else len(ids)
+            if settled:
+                self.columns = [np.concatenate((column, new[:settled])) for column, new in zip(self.columns, tail)]
+                self.settled_id = int(ids[settled - 1])
+            columns = [np.concatenate((column, new[settled:])) for column, new in zip(self.columns, tail)]
+            return columns, self.status_labels
+
+transition_log = TransitionLog()
+
+def ticket_filter(query, created_from: Optional[datetime], created_to: Optional[datetime]):
+    if created_from is not None:
+        query = query.where(Ticket.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(Ticket.created_at < created_to)
+    return query
+
+def percentile_table(values: np.ndarray, codes: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+    # Percentiles for every group in one pass: sort by (group, value), then
+    # each group is a contiguous slice and its percentiles are interpolated
+    # between neighbouring ranks, as np.percentile does.
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # Empty groups get clamped, meaningless ranks; callers skip them.
+    last = np.minimum(starts + np.maximum(counts - 1, 0), max(len(values) - 1, 0))
+    table = {
+        "count": counts,
+        "mean": np.bincount(codes, weights=values, minlength=groups) / np.maximum(counts, 1),
+    }
+    for pct in PERCENTILES:
+        if not len(values):
+            table[f"p{pct}"] = np.zeros(groups)
+            continue
+        rank = starts + np.maximum(counts - 1, 0) * (pct / 100)
+        low = np.minimum(np.floor(rank).astype(np.int64), last)
+        high = np.minimum(low + 1, last)
+        table[f"p{pct}"] = values[low] + (values[high] - values[low]) * (rank - np.floor(rank))
+    return table
+
+def summarize(values: np.ndarray, codes: np.ndarray, groups: int) -> Dict[int, Dict]:
+    table = percentile_table(values, codes, groups)
+    return {
+        int(code): {name: column[code].item() for name, column in table.items()}
+        for code in np.flatnonzero(table["count"])
+    }
+
+def encode(values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    labels, codes = np.unique(values, return_inverse=True)
+    return codes.reshape(-1), [str(label) for label in labels]
+
+def encode_engineers(ids: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    codes, labels = encode(ids)
+    return codes, [UNASSIGNED if label == "0" else label for label in labels]
+
+def empty_group() -> Dict:
+    return {"time_in_status": {}, "cycle_time": None, "lead_time": None}
+
+def flow_metrics(db: Session, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None, log: TransitionLog = transition_log) -> Dict:
+    ticket_query = ticket_filter(
+        select(Ticket.id, Ticket.priority, func.coalesce(Employee.department, UNASSIGNED), Ticket.created_at)
+        .select_from(Ticket)
+        .outerjoin(Employee, Ticket.employee_id == Employee.id)
+        .order_by(Ticket.id),
+        created_from, created_to,
+    )
+    ticket_ids, priorities, departments, created_at = fetch_columns(db, ticket_query, [INT, STR, STR, TIME])
+    (ticket, status, engineer, at), status_labels = log.read(db)
+
+    # Group the log by ticket; a stable sort keeps each ticket's rows in id
+    # order. Rows of deleted tickets, or of tickets outside the date filter,
+    # are dropped.
+    order = np.argsort(ticket, kind="stable")
+    position = np.searchsorted(ticket_ids, ticket[order])
+    known = ticket_ids[np.minimum(position, len(ticket_ids) - 1)] == ticket[order] if len(ticket_ids) else position < 0
+    order, position = order[known], position[known]
+    ticket, status, engineer, at = ticket[order], status[order], engineer[order], at[order]
+
+    # Row i starts a stint when it is a ticket's first row or changes status.
+    stint_start = np.ones(len(ticket), dtype=bool)
+    stint_start[1:] = (ticket[1:] != ticket[:-1]) | (status[1:] != status[:-1])
+    starts = np.flatnonzero(stint_start)
+    finished = ticket[starts[:-1]] == ticket[starts[1:]]
+    stint = starts[:-1][finished]
+    stint_seconds = at[starts[1:][finished]] - at[stint]
+
+    is_done = np.isin(np.array(status_labels, dtype=str), DONE_STATUSES)
+    done = starts[is_done[status[starts]]] if len(starts) else starts
+
+    # First entry into in_progress per ticket, then the first done stint that
+    # starts after it in the same ticket. Rows are sorted by ticket, so a
+    # binary search over row numbers finds it.
+    in_progress = starts[status[starts] == status_labels.index(IN_PROGRESS)] if IN_PROGRESS in status_labels else starts[:0]
+    _, first = np.unique(ticket[in_progress], return_index=True)
+    cycle_start = in_progress[first]
+    following = np.searchsorted(done, cycle_start, side="right")
+    has_following = following < len(done)
+    cycle_start = cycle_start[has_following]
+    cycle_end = done[following[has_following]]
+    same_ticket = ticket[cycle_end] == ticket[cycle_start]
+    cycle_start, cycle_end = cycle_start[same_ticket], cycle_end[same_ticket]
+    cycle_seconds = at[cycle_end] - at[cycle_start]
+
+    _, first = np.unique(ticket[done], return_index=True)
+    lead_end = done[first]
+    lead_seconds = np.maximum(at[lead_end] - seconds(created_at)[position[lead_end]], 0)
+
+    priority_code, priority_labels = encode(priorities)
+    department_code, department_labels = encode(departments)
+    dimensions = {
+        "overall": (np.zeros(len(ticket), dtype=np.int64), ["all"]),
+        "by_engineer": encode_engineers(engineer),
+        "by_priority": (priority_code[position], priority_labels),
+        "by_department": (department_code[position], department_labels),
+    }
+
+    report = {"tickets": len(ticket_ids), "transitions": len(ticket)}
+    statuses = len(status_labels)
+    for name, (codes, labels) in dimensions.items():
+        groups: Dict[str, Dict] = {}
+        # Time in status is grouped by (group, status) through one combined code.
+        for code, stats in summarize(stint_seconds, codes[stint] * statuses + status[stint], len(labels) * statuses).items():
+            group = groups.setdefault(labels[code // statuses], empty_group())
+            group["time_in_status"][status_labels[code % statuses]] = stats
+        for code, stats in summarize(cycle_seconds, codes[cycle_end], len(labels)).items():
+            groups.setdefault(labels[code], empty_group())["cycle_time"] = stats
+        for code, stats in summarize(lead_seconds, codes[lead_end], len(labels)).items():
+            groups.setdefault(labels[code], empty_group())["lead_time"] = stats
+        report[name] = groups
+    report["overall"] = report["overall"].get("all", empty_group())
+    return report
+
+def run_flow_metrics(created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> Dict:
+    db = SessionLocal()
+    try:
+        return flow_metrics(db, created_from, created_to)
+    finally:
+        db.close()
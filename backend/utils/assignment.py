@@ -0,0 +1,228 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.database import SessionLocal
+from models.engineer import Engineer
+from models.ticket import Ticket
+from utils.search import tokenize
+
+ACTIVE_STATUSES = ("open", "in_progress")
+
+def parse_weights(value: str) -> Dict[str, int]:
+    weights = {}
+    for pair in value.split(","):
+        priority, _, weight = pair.partition("=")
+        if priority.strip() and weight.strip():
+            weights[priority.strip()] = int(weight)
+    return weights
+
+# Load is the weighted sum of an engineer's open and in-progress tickets;
+# unknown priorities weigh 1. Engineers holding ASSIGN_MAX_ACTIVE_TICKETS
+# active tickets are skipped until they close some (0 disables the cap).
+ASSIGN_PRIORITY_WEIGHTS = parse_weights(os.getenv("ASSIGN_PRIORITY_WEIGHTS", "low=1,medium=2,high=4"))
+ASSIGN_MAX_ACTIVE_TICKETS = int(os.getenv("ASSIGN_MAX_ACTIVE_TICKETS", "15"))
+# In-memory loads are rebuilt from the tables this often, which also picks up
+# assignments made through other workers.
+ASSIGN_REFRESH_INTERVAL = int(os.getenv("ASSIGN_REFRESH_INTERVAL", "30"))
+
+# (engineer id, status, priority) of a ticket, as far as load is concerned.
+TicketState = Tuple[Optional[int], Optional[str], Optional[str]]
+
+def ticket_state(ticket) -> TicketState:
+    return (ticket.engineer_id, ticket.status, ticket.priority)
+
+def priority_weight(priority: Optional[str]) -> int:
+    return ASSIGN_PRIORITY_WEIGHTS.get(priority, 1)
+
+class EngineerLoad:
+    __slots__ = ("id", "keywords", "load", "active_tickets", "version")
+
+    def __init__(self, id: int, keywords: Set[str]):
+        self.id = id
+        self.keywords = keywords
+        self.load = 0
+        self.active_tickets = 0
+        self.version = 0
+
+class Booking(NamedTuple):
+    # A placement whose ticket write has not committed yet; only active
+    # tickets carry load.
+    id: int
+    engineer_id: int
+    priority: Optional[str]
+    active: bool
+
+class WorkloadBalancer:
+    # One min-heap over every eligible engineer plus one per specialization
+    # keyword. A load change bumps the engineer's version and pushes fresh
+    # entries; superseded entries are discarded when they surface at the top
+    # (lazy invalidation), so each placement is O(log n) amortised.
+    def __init__(self, max_active_tickets: int = ASSIGN_MAX_ACTIVE_TICKETS):
+        self.max_active_tickets = max_active_tickets
+        self.lock = threading.Lock()
+        self.engineers: Dict[int, EngineerLoad] = {}
+        self.everyone: List[Tuple[int, int, int]] = []
+        self.by_keyword: Dict[str, List[Tuple[int, int, int]]] = {}
+        self.bookings: Dict[int, Booking] = {}
+        self.booking_ids = itertools.count(1)
+
+    def _eligible(self, engineer: EngineerLoad) -> bool:
+        return not self.max_active_tickets or engineer.active_tickets < self.max_active_tickets
+
+    def _push(self, engineer: EngineerLoad):
+        engineer.version += 1
+        if not self._eligible(engineer):
+            return
+        entry = (engineer.load, engineer.id, engineer.version)
+        heapq.heappush(self.everyone, entry)
+        for keyword in engineer.keywords:
+            heapq.heappush(self.by_keyword.setdefault(keyword, []), entry)
+
+    def _peek(self, heap: List[Tuple[int, int, int]]) -> Optional[Tuple[int, int, int]]:
+        while heap:
+            load, engineer_id, version = heap[0]
+            engineer = self.engineers.get(engineer_id)
+            if engineer is not None and engineer.version == version:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _compact(self):
+        # Stale entries that never reach the top would otherwise pile up.
+        live = len(self.engineers)
+        if len(self.everyone) > 4 * live + 64:
+            engineers = list(self.engineers.values())
+            self.everyone = []
+            self.by_keyword = {}
+            for engineer in engineers:
+                self._push(engineer)
+
+    def _adjust(self, engineer_id: Optional[int], priority: Optional[str], sign: int):
+        engineer = self.engineers.get(engineer_id) if engineer_id is not None else None
+        if engineer is None:
+            return
+        engineer.load += sign * priority_weight(priority)
+        engineer.active_tickets += sign
+        self._push(engineer)
+
+    def load(self, engineers: List[Tuple[int, Optional[str]]], active: List[Tuple[int, str, int]]):
+        # engineers: (id, specialization) of active engineers;
+        # active: (engineer id, priority, ticket count) of open/in-progress tickets.
+        # Bookings still waiting for their commit are not in those counts,
+        # so they are carried over.
+        with self.lock:
+            self.engineers = {
+                engineer_id: EngineerLoad(engineer_id, set(tokenize(specialization or "")))
+                for engineer_id, specialization in engineers
+            }
+            for engineer_id, priority, count in active:
+                engineer = self.engineers.get(engineer_id)
+                if engineer is not None:
+                    engineer.load += priority_weight(priority) * count
+                    engineer.active_tickets += count
+            for booking in self.bookings.values():
+                engineer = self.engineers.get(booking.engineer_id)
+                if engineer is not None:
+                    engineer.load += priority_weight(booking.priority)
+                    engineer.active_tickets += 1
+            self.everyone = []
+            self.by_keyword = {}
+            for engineer in self.engineers.values():
+                self._push(engineer)
+
+    def place(self, text: str, priority: Optional[str], status: Optional[str]) -> Optional[Booking]:
+        # Picks the least-loaded eligible engineer whose specialization shares
+        # a keyword with the ticket, falling back to the least-loaded overall.
+        # An active ticket is booked against them straight away, so placements
+        # made before the commit see each other; callers confirm the booking
+        # once the write commits, or release it if it does not.
+        keywords = set(tokenize(text))
+        with self.lock:
+            best = None
+            for keyword in keywords & self.by_keyword.keys():
+                top = self._peek(self.by_keyword[keyword])
+                if top is not None and (best is None or top < best):
+                    best = top
+            if best is None:
+                best = self._peek(self.everyone)
+            if best is None:
+                return None
+            booking = Booking(next(self.booking_ids), best[1], priority, status in ACTIVE_STATUSES)
+            if booking.active:
+                self.bookings[booking.id] = booking
+                self._adjust(booking.engineer_id, priority, 1)
+                self._compact()
+            return booking
+
+    def confirm(self, booking: Booking):
+        # The ticket committed: its load now counts like any other.
+        with self.lock:
+            self.bookings.pop(booking.id, None)
+
+    def release(self, booking: Booking):
+        # The ticket write was rolled back.
+        with self.lock:
+            if self.bookings.pop(booking.id, None) is not None:
+                self._adjust(booking.engineer_id, booking.priority, -1)
+
+    def ticket_changed(self, before: Optional[TicketState], after: Optional[TicketState]):
+        # Called after a ticket write commits; either side is None for a
+        # create or a delete.
+        with self.lock:
+            if before is not None and before[1] in ACTIVE_STATUSES:
+                self._adjust(before[0], before[2], -1)
+            if after is not None and after[1] in ACTIVE_STATUSES:
+                self._adjust(after[0], after[2], 1)
+            self._compact()
+
+    def engineer_changed(self, engineer_id: int, specialization: Optional[str], is_active: bool):
+        with self.lock:
+            current = self.engineers.pop(engineer_id, None)
+            if not is_active:
+                return
+            engineer = EngineerLoad(engineer_id, set(tokenize(specialization or "")))
+            if current is not None:
+                engineer.load = current.load
+                engineer.active_tickets = current.active_tickets
+                engineer.version = current.version
+            self.engineers[engineer_id] = engineer
+            self._push(engineer)
+
+    def engineer_removed(self, engineer_id: int):
+        with self.lock:
+            self.engineers.pop(engineer_id, None)
+
+workload = WorkloadBalancer()
+
+def refresh_workload(db: Session, balancer: WorkloadBalancer = workload):
+    # The tables are read outside the balancer's lock; load() swaps the heaps
+    # in under it, with the bookings still pending at that point. A write
+    # that commits while these queries run can be off by one ticket until
+    # the next refresh.
+    engineers = db.execute(select(Engineer.id, Engineer.specialization).where(Engineer.is_active.is_(True))).all()
+    active = db.execute(
+        select(Ticket.engineer_id, Ticket.priority, func.count())
+        .where(Ticket.engineer_id.is_not(None), Ticket.status.in_(ACTIVE_STATUSES))
+        .group_by(Ticket.engineer_id, Ticket.priority)
+    ).all()
+    balancer.load(engineers, active)
+
+def run_workload_refresh():
+    db = SessionLocal()
+    try:
+        refresh_workload(db)
+    except Exception as e:
+        print(f"Warning: Could not refresh engineer workload: {e}")
+    finally:
+        db.close()
+
+async def refresh_workload_periodically():
+    while True:
+        await run_in_threadpool(run_workload_refresh)
+        await asyncio.sleep(ASSIGN_REFRESH_INTERVAL)
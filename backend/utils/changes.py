@@ -0,0 +1,67 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.database import SessionLocal
+from models.ticket_change import TicketChange
+
+# A change row only becomes part of the token a client can resume from once it
+# is older than this, so ids allocated by transactions that commit out of
+# order are never skipped. Changes inside the window are re-sent; applying an
+# upsert or a tombstone twice is harmless.
+CHANGES_SETTLE_SECONDS = float(os.getenv("CHANGES_SETTLE_SECONDS", "5"))
+CHANGES_RETENTION_HOURS = float(os.getenv("CHANGES_RETENTION_HOURS", "72"))
+CHANGES_PRUNE_INTERVAL = int(os.getenv("CHANGES_PRUNE_INTERVAL", "3600"))
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+def record_change(db: Session, ticket_id: int, operation: str = UPSERT):
+    db.add(TicketChange(ticket_id=ticket_id, operation=operation))
+
+async def record_changes(db, ticket_ids: List[int], operation: str = UPSERT):
+    # For many tickets at once: a single executemany, where adding objects
+    # would flush one INSERT ... RETURNING per row.
+    if ticket_ids:
+        await db.execute(insert(TicketChange), [{"ticket_id": ticket_id, "operation": operation} for ticket_id in ticket_ids])
+
+def current_token(db: Session) -> int:
+    return db.query(func.max(TicketChange.id)).scalar() or 0
+
+def settle_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+
+def settled_token_select():
+    # The token for a snapshot read in the same transaction: the newest change
+    # past the settle window, the same bound /tickets/changes advances to.
+    return select(func.max(TicketChange.id)).where(TicketChange.created_at <= settle_cutoff())
+
+def prune_changes(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=CHANGES_RETENTION_HOURS)
+    # Always keep the newest row so the retained range still proves that older
+    # tokens were pruned and their holders have to reload.
+    newest = current_token(db)
+    deleted = db.query(TicketChange).filter(
+        TicketChange.created_at < cutoff,
+        TicketChange.id < newest,
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def run_prune():
+    db = SessionLocal()
+    try:
+        prune_changes(db)
+    except Exception as e:
+        db.rollback()
+        print(f"Warning: Could not prune ticket changes: {e}")
+    finally:
+        db.close()
+
+async def prune_periodically():
+    while True:
+        await run_in_threadpool(run_prune)
+        await asyncio.sleep(CHANGES_PRUNE_INTERVAL)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+RESYNC = object()
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class Subscription:
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(buffer_size)
+
+class ChangeBus:
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.subscribers: Set[Subscription] = set()
+
+    def subscribe(self) -> Subscription:
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(self.buffer_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event_type: str, payload: Dict):
+        # Called from request handlers, possibly on a threadpool worker: encode
+        # once here and hand the fan-out to the event loop without waiting.
+        if self.loop is None or not self.subscribers:
+            return
+        message = json.dumps({"type": event_type, **payload}, default=json_default)
+        try:
+            self.loop.call_soon_threadsafe(self._fan_out, message)
+        except RuntimeError:
+            self.loop = None
+
+    def _fan_out(self, message: str):
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(RESYNC)
+
+change_bus = ChangeBus()
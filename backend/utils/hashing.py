@@ -0,0 +1,75 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from utils import security
+from utils.metrics import Gauge, Histogram
+
+# bcrypt runs in its own small process pool so a login burst cannot occupy the
+# threadpool (or the GIL) that every other request depends on. Callers beyond
+# HASH_CONCURRENCY wait up to HASH_QUEUE_TIMEOUT seconds for a slot and are
+# then turned away rather than queueing without bound.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(2, os.cpu_count() or 1))))
+HASH_CONCURRENCY = int(os.getenv("HASH_CONCURRENCY", str(HASH_WORKERS * 2)))
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "2"))
+
+hash_queue_depth = Gauge("hash_queue_depth", "Password hash requests waiting for a pool slot.")
+hash_in_flight = Gauge("hash_in_flight", "Password hash requests submitted to the pool.")
+hash_duration = Histogram("hash_duration_seconds", "Time spent hashing or verifying a password, including queueing.")
+
+class HashingUnavailable(Exception):
+    pass
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned, not forked: the parent holds DB connections and threads.
+        _executor = ProcessPoolExecutor(HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(HASH_CONCURRENCY)
+    return _slots
+
+async def _run(operation: str, func, *args):
+    started = time.perf_counter()
+    slots = _get_slots()
+    hash_queue_depth.inc()
+    try:
+        await asyncio.wait_for(slots.acquire(), HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HashingUnavailable("Timed out waiting for a hashing slot")
+    finally:
+        hash_queue_depth.dec()
+    hash_in_flight.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool on the next call.
+        shutdown_hash_pool()
+        raise HashingUnavailable("Hashing pool is restarting")
+    finally:
+        hash_in_flight.dec()
+        slots.release()
+        hash_duration.observe(time.perf_counter() - started, operation=operation)
+
+async def hash_password(password: str) -> str:
+    return await _run("hash", security.hash_password, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run("verify", security.verify_password, plain_password, hashed_password)
+
+def shutdown_hash_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,149 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from utils.metrics import COLLECTORS, Counter, Gauge, Histogram
+
+# Request and database metrics. Everything on the hot path is a perf_counter
+# call and a dict update under an uncontended lock, so collection costs a few
+# microseconds per request and per statement.
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+http_requests = Counter("http_requests_total", "HTTP requests by method, route template and status code.")
+http_duration = Histogram("http_request_duration_seconds", "HTTP request latency by method and route template.")
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+request_queries = Histogram("http_request_db_queries", "SQL statements executed per HTTP request.", QUERY_BUCKETS)
+request_db_time = Histogram("http_request_db_seconds", "Time spent in SQL statements per HTTP request.", FAST_BUCKETS)
+
+db_queries = Counter("db_queries_total", "SQL statements executed, by engine.")
+db_errors = Counter("db_errors_total", "SQL statements that raised, by engine.")
+db_duration = Histogram("db_query_duration_seconds", "SQL statement latency by engine.", FAST_BUCKETS)
+pool_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", FAST_BUCKETS)
+pool_timeouts = Counter("db_pool_checkout_timeouts_total", "Connection checkouts that gave up waiting.")
+pool_in_use = Gauge("db_pool_connections_in_use", "Connections checked out of the pool.")
+pool_size = Gauge("db_pool_size", "Configured pool size.")
+pool_overflow = Gauge("db_pool_overflow", "Connections open beyond the pool size; negative while the pool is still filling.")
+pool_idle = Gauge("db_pool_connections_idle", "Open connections waiting in the pool.")
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+# Set by the middleware for the duration of a request. Threadpool calls and
+# the async driver's greenlets inherit the context, so statements run on
+# behalf of a request find its stats here; background jobs see None.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def instrument_engine(engine: Engine, name: str):
+    # Pass the sync engine; for an AsyncEngine that is engine.sync_engine.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_queries.inc(engine=name)
+        db_duration.observe(elapsed, engine=name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        db_errors.inc(engine=name)
+
+    pool = engine.pool
+
+    @event.listens_for(pool, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_in_use.inc(engine=name)
+
+    @event.listens_for(pool, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        pool_in_use.dec(engine=name)
+
+    # The pool has no event that fires before a checkout starts waiting, so
+    # time the pool's own get. Pools are only recreated on dispose, which
+    # happens at shutdown.
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc(engine=name)
+            raise
+        finally:
+            pool_wait.observe(time.perf_counter() - started, engine=name)
+
+    pool._do_get = timed_do_get
+
+    def collect_pool():
+        # SQLite's in-memory and single-thread pools have no size to report.
+        if hasattr(pool, "size") and hasattr(pool, "overflow"):
+            pool_size.set(pool.size(), engine=name)
+            pool_overflow.set(pool.overflow(), engine=name)
+            pool_idle.set(pool.checkedin(), engine=name)
+
+    COLLECTORS.append(collect_pool)
+
+def route_template(scope) -> str:
+    # Routes inside an included router report their path without the include
+    # prefix, so take the prefix back from the request path: it is whatever
+    # precedes the template's own segments.
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+    prefix = scope["path"].rsplit("/", template.count("/"))[0]
+    return prefix + template
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware, which would add a task and a
+    # memory stream to every request. Routes are labelled by their template
+    # (/api/tickets/{ticket_id}) so label cardinality stays bounded.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        http_in_flight.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            current_request.reset(token)
+            path = route_template(scope)
+            method = scope["method"]
+            http_requests.inc(method=method, route=path, status=status)
+            http_duration.observe(elapsed, method=method, route=path)
+            request_queries.observe(stats.queries, route=path)
+            request_db_time.observe(stats.db_time, route=path)
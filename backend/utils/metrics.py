@@ -0,0 +1,112 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# A small in-process registry rendered in the Prometheus text format. Values
+# are per worker process; scrape each worker or aggregate downstream.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = ",".join(
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + escaped + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+        REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        # Per series: one slot per bucket, then the running sum. Slots count
+        # only their own bucket; they are made cumulative when rendered.
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, series in self._series.items():
+                count = 0
+                for bound, in_bucket in zip(self.buckets, series):
+                    count += in_bucket
+                    le = (("le", _format_value(bound)),)
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {_format_value(count)}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(count)}")
+        return lines
+
+REGISTRY: List[Metric] = []
+# Called before each render to refresh values that are cheaper to sample at
+# scrape time than to track on every change.
+COLLECTORS: List[Callable[[], None]] = []
+
+def render_metrics() -> str:
+    for collect in COLLECTORS:
+        collect()
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
@@ -0,0 +1,17 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple, Union
+
+def encode_cursor(sort_value: Union[datetime, str], id: int) -> str:
+    value = sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value
+    raw = json.dumps([value, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, parse: Callable[[str], Any] = datetime.fromisoformat) -> Optional[Tuple[Any, int]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return parse(sort_value), int(id)
+    except (ValueError, TypeError):
+        return None
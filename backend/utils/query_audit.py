@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.instrumentation import route_template
+from utils.metrics import Counter
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+# Opt-in query auditing for development and CI. QUERY_AUDIT=log prints
+# findings; QUERY_AUDIT=strict also turns the offending response into a 500
+# so a test client or benchmark run fails on it. Findings:
+#   n+1     the same statement fingerprint from the same call site ran
+#           QUERY_AUDIT_REPEAT or more times in one request
+#   slow    a statement took longer than QUERY_AUDIT_SLOW_MS
+#   budget  a request ran more statements than its route's budget
+# QUERY_BUDGETS sets per-route budgets as "GET /api/tickets=3,GET
+# /api/tickets/{id}=2"; QUERY_BUDGET applies to every other route (0 = none).
+QUERY_AUDIT = os.getenv("QUERY_AUDIT", "off").lower()
+QUERY_AUDIT_REPEAT = int(os.getenv("QUERY_AUDIT_REPEAT", "3"))
+QUERY_AUDIT_SLOW_MS = float(os.getenv("QUERY_AUDIT_SLOW_MS", "100"))
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))
+STACK_DEPTH = 8
+
+def parse_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for pair in value.split(","):
+        route, _, budget = pair.rpartition("=")
+        if route.strip() and budget.strip():
+            budgets[" ".join(route.split())] = int(budget)
+    return budgets
+
+QUERY_BUDGETS = parse_budgets(os.getenv("QUERY_BUDGETS", ""))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames from these files are plumbing between the caller and the driver.
+SKIPPED_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(BACKEND_DIR, "models", "database.py"),
+    os.path.join(BACKEND_DIR, "utils", "instrumentation.py"),
+}
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|__\[POSTCOMPILE_\w+\]")
+PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+audit_findings = Counter("query_audit_findings_total", "Query audit findings by kind and route.")
+# The most recent findings, for tests and the benchmark runner to inspect.
+findings: deque = deque(maxlen=1000)
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    # Literals and IN lists collapse, so one query issued with different
+    # values or list lengths is counted as the same statement.
+    normalized = LITERALS.sub("?", statement)
+    normalized = PLACEHOLDER_LISTS.sub("(?)", normalized)
+    return WHITESPACE.sub(" ", normalized).strip()
+
+def is_app_frame(filename: str) -> bool:
+    return filename.startswith(BACKEND_DIR) and "site-packages" not in filename and filename not in SKIPPED_FILES
+
+def app_frames(frames) -> List[str]:
+    return [
+        f"{os.path.relpath(frame.f_code.co_filename, BACKEND_DIR)}:{lineno} in {frame.f_code.co_name}"
+        for frame, lineno in frames
+        if is_app_frame(frame.f_code.co_filename)
+    ]
+
+class RequestAudit:
+    def __init__(self, scope, task: Optional[asyncio.Task]):
+        self.scope = scope
+        self.task = task
+        self.queries = 0
+        self.sites: Dict[Tuple[str, str], int] = {}
+        self.findings: List[Dict] = []
+        self.budget_checked = False
+        self.lock = threading.Lock()
+
+    def route(self) -> str:
+        return f"{self.scope['method']} {route_template(self.scope)}"
+
+    def stack(self) -> List[str]:
+        # Outermost first. With the threadpool session the handler's frames
+        # live on the suspended request task, so its await chain is walked.
+        # The async driver runs statements in a child greenlet instead, and
+        # the handler's frames are on the parent greenlet's stack.
+        outer = []
+        parent = greenlet.getcurrent().parent if greenlet is not None else None
+        if parent is not None and parent.gr_frame is not None:
+            frame = parent.gr_frame
+            while frame is not None:
+                outer.append((frame, frame.f_lineno))
+                frame = frame.f_back
+            outer.reverse()
+        else:
+            coro = self.task.get_coro() if self.task is not None else None
+            while coro is not None:
+                frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+                if frame is not None:
+                    outer.append((frame, frame.f_lineno))
+                coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        current = []
+        frame = sys._getframe(1)
+        while frame is not None:
+            current.append((frame, frame.f_lineno))
+            frame = frame.f_back
+        return app_frames(outer + current[::-1])[-STACK_DEPTH:]
+
+    def add_finding(self, kind: str, detail: str, stack: List[str]):
+        finding = {"kind": kind, "route": self.route(), "detail": detail, "stack": stack}
+        self.findings.append(finding)
+        findings.append(finding)
+        audit_findings.inc(kind=kind, route=finding["route"])
+        print(f"Query audit: {kind} in {finding['route']}: {detail}" + "".join(f"\n    {line}" for line in stack))
+
+    def record(self, statement: str, elapsed: float):
+        stack = self.stack()
+        site = stack[-1] if stack else "unknown"
+        key = (fingerprint(statement), site)
+        with self.lock:
+            self.queries += 1
+            count = self.sites.get(key, 0) + 1
+            self.sites[key] = count
+            # Report each repeated statement once, when it crosses the limit.
+            if count == QUERY_AUDIT_REPEAT:
+                self.add_finding("n+1", f"{count}+ x {key[0][:200]} at {site}", stack)
+            if elapsed * 1000 > QUERY_AUDIT_SLOW_MS:
+                self.add_finding("slow", f"{elapsed * 1000:.1f} ms: {key[0][:200]}", stack)
+
+    def check_budget(self):
+        route = self.route()
+        budget = QUERY_BUDGETS.get(route, QUERY_BUDGET)
+        with self.lock:
+            if self.budget_checked:
+                return
+            self.budget_checked = True
+            if budget and self.queries > budget:
+                self.add_finding("budget", f"{self.queries} statements, budget {budget}", [])
+
+current_audit: ContextVar[Optional[RequestAudit]] = ContextVar("current_audit", default=None)
+
+def audit_engine(engine: Engine):
+    # Pass the sync engine; for an AsyncEngine that is engine.sync_engine.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("audit_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["audit_started"].pop()
+        audit = current_audit.get()
+        if audit is not None:
+            audit.record(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("audit_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+class QueryAuditMiddleware:
+    def __init__(self, app, strict: bool = QUERY_AUDIT == "strict"):
+        self.app = app
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        audit = RequestAudit(scope, asyncio.current_task())
+        token = current_audit.set(audit)
+        replaced = False
+
+        async def send_checked(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start" and self.strict:
+                # Handlers finish their queries before the response starts
+                # (streaming bodies aside), so the verdict is known here.
+                audit.check_budget()
+                if audit.findings:
+                    replaced = True
+                    body = json.dumps({"detail": "Query audit failed", "findings": audit.findings}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_checked)
+        finally:
+            current_audit.reset(token)
+            audit.check_budget()
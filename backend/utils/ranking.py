@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.database import SessionLocal
+from models.ticket import Ticket
+from models.ticket_change import TicketChange
+from utils.changes import UPSERT
+from utils.events import change_bus
+from utils.response_cache import response_cache, TICKETS
+
+# Card order within a kanban column: tickets sort by (board_rank, id), where
+# board_rank is a string of base-36 digits read as a fraction, so there is
+# always a key between two others and moving a card writes only that card.
+# The digits sort the same under binary and MySQL's case-insensitive
+# collations.
+#
+# The end of a column is the current time as a key: new tickets, and cards
+# moved to another column without a position, land below everything already
+# there without reading the column first. Keys grow a digit every few moves
+# into the same gap; once a move produces one longer than
+# RANK_REBALANCE_LENGTH, the RANK_REBALANCE_WINDOW cards around it get short,
+# evenly spaced keys in the background. The rewrite keeps the order and
+# leaves versions alone, so it never conflicts with a drag, and skips cards
+# moved since it read them; a drag that read its neighbours' keys just before a
+# rewrite can land out of place, and the next move of that card repairs it.
+# Clients reload the column when they see tickets.rebalanced, as their
+# cursors hold the old keys.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+TIME_PREFIX = "h"
+TIME_DIGITS = 11
+EPOCH = datetime(1970, 1, 1)
+RANK_REBALANCE_LENGTH = int(os.getenv("RANK_REBALANCE_LENGTH", "24"))
+RANK_REBALANCE_INTERVAL = int(os.getenv("RANK_REBALANCE_INTERVAL", "60"))
+RANK_REBALANCE_WINDOW = int(os.getenv("RANK_REBALANCE_WINDOW", "200"))
+
+def time_rank(at: Optional[datetime] = None) -> str:
+    micros = (at or datetime.utcnow()) - EPOCH
+    value = micros // timedelta(microseconds=1)
+    digits = []
+    for _ in range(TIME_DIGITS):
+        value, digit = divmod(value, len(DIGITS))
+        digits.append(DIGITS[digit])
+    # Trailing zeros are dropped: a key ending in 0 has no key between it and
+    # the same key without the 0, and dropping them keeps the order.
+    return (TIME_PREFIX + "".join(reversed(digits))).rstrip("0")
+
+def midpoint(lower: str, upper: Optional[str]) -> str:
+    # A key strictly between lower ("" for the start) and upper (None for the
+    # end), as short as possible. Neither may end in 0.
+    if upper is not None:
+        common = 0
+        while common < len(upper) and (lower[common] if common < len(lower) else "0") == upper[common]:
+            common += 1
+        if common:
+            return upper[:common] + midpoint(lower[common:], upper[common:])
+    low = DIGITS.index(lower[0]) if lower else 0
+    high = DIGITS.index(upper[0]) if upper is not None else len(DIGITS)
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[low] + midpoint(lower[1:], None)
+
+def rank_between(lower: Optional[str], upper: Optional[str]) -> str:
+    if upper is None:
+        now = time_rank()
+        if lower is None or now > lower:
+            return now
+    return midpoint(lower or "", upper)
+
+async def neighbour_rank(db, status: str, ticket_id: int, rank: str, above: bool) -> Optional[str]:
+    # The closest key above or below rank in the column, from
+    # ix_tickets_status_board_rank_id.
+    aggregate = func.max(Ticket.board_rank) if above else func.min(Ticket.board_rank)
+    bound = Ticket.board_rank < rank if above else Ticket.board_rank > rank
+    return await db.scalar(select(aggregate).where(Ticket.status == status, bound, Ticket.id != ticket_id))
+
+async def place_rank(db, ticket_id: int, status: str, before_id: Optional[int], after_id: Optional[int]) -> str:
+    # The key that puts the ticket directly below before_id and above
+    # after_id in the status column. Clients send the neighbours they see,
+    # which may be the edge of a partly loaded column, so a missing or stale
+    # neighbour is looked up instead of trusted.
+    ids = [id for id in (before_id, after_id) if id is not None and id != ticket_id]
+    ranks = {}
+    if ids:
+        rows = await db.execute(select(Ticket.id, Ticket.board_rank).where(Ticket.id.in_(ids), Ticket.status == status))
+        ranks = dict(rows.all())
+    lower, upper = ranks.get(before_id), ranks.get(after_id)
+    if lower is not None and (upper is None or upper <= lower):
+        upper = await neighbour_rank(db, status, ticket_id, lower, above=False)
+    elif lower is None and upper is not None:
+        lower = await neighbour_rank(db, status, ticket_id, upper, above=True)
+    rank = rank_between(lower, upper)
+    if len(rank) > RANK_REBALANCE_LENGTH:
+        request_rebalance(status, rank)
+    return rank
+
+def spread(lower: str, upper: Optional[str], count: int) -> List[str]:
+    # count keys strictly between lower and upper, by bisection, so they grow
+    # by about one digit for every five halvings of the gap.
+    if count <= 0:
+        return []
+    middle = midpoint(lower, upper)
+    below = (count - 1) // 2
+    return spread(lower, middle, below) + [middle] + spread(middle, upper, count - 1 - below)
+
+# Per column, the last over-long key placed since the previous run.
+pending_rebalance: Dict[str, str] = {}
+pending_lock = threading.Lock()
+
+def request_rebalance(status: str, rank: str):
+    with pending_lock:
+        pending_rebalance[status] = rank
+
+def rebalance_window(db: Session, status: str, around: str) -> int:
+    # Rewrites the RANK_REBALANCE_WINDOW cards nearest around with keys spread
+    # evenly between the cards just outside the window, which keep theirs, so
+    # a column of any length costs one small transaction.
+    half = RANK_REBALANCE_WINDOW // 2
+    columns = (Ticket.id, Ticket.version, Ticket.board_rank)
+    below = db.execute(
+        select(*columns).where(Ticket.status == status, Ticket.board_rank < around)
+        .order_by(Ticket.board_rank.desc(), Ticket.id.desc()).limit(half + 1)
+    ).all()
+    lower = below.pop().board_rank if len(below) > half else ""
+    room = RANK_REBALANCE_WINDOW - len(below)
+    above = db.execute(
+        select(*columns).where(Ticket.status == status, Ticket.board_rank >= around)
+        .order_by(Ticket.board_rank, Ticket.id).limit(room + 1)
+    ).all()
+    upper = above.pop().board_rank if len(above) > room else None
+    window = list(reversed(below)) + above
+    if not window:
+        return 0
+    if upper is None:
+        # The end of the column stays below time_rank(), where new cards go.
+        now = time_rank()
+        if now > window[-1].board_rank:
+            upper = now
+    if upper is not None and upper <= lower:
+        return 0
+
+    moved = [
+        {"ticket_id": row.id, "seen_version": row.version, "rank": rank}
+        for row, rank in zip(window, spread(lower, upper, len(window)))
+        if rank != row.board_rank
+    ]
+    if not moved:
+        return 0
+    # Core executemany on the table: the ORM would check and bump versions,
+    # and updated_at is kept, as reordering is not an edit. Each row is only
+    # rewritten if it is still in the column at the version read above; a
+    # ticket moved in between keeps the rank its move gave it.
+    table = Ticket.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("ticket_id"), table.c.version == bindparam("seen_version"), table.c.status == status)
+        .values(board_rank=bindparam("rank"), updated_at=table.c.updated_at),
+        moved,
+    )
+    # Cursors and cached pages hold the old keys, so each rewritten card is a
+    # change.
+    db.execute(insert(TicketChange), [{"ticket_id": row["ticket_id"], "operation": UPSERT} for row in moved])
+    db.commit()
+    return len(moved)
+
+def run_rebalance() -> Dict[str, int]:
+    with pending_lock:
+        requests = dict(pending_rebalance)
+        pending_rebalance.clear()
+    rebalanced = {}
+    for status, around in requests.items():
+        db = SessionLocal()
+        try:
+            rebalanced[status] = rebalance_window(db, status, around)
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Could not rebalance the {status} column: {e}")
+        finally:
+            db.close()
+    return rebalanced
+
+async def rebalance_periodically():
+    while True:
+        await asyncio.sleep(RANK_REBALANCE_INTERVAL)
+        if pending_rebalance:
+            rebalanced = await run_in_threadpool(run_rebalance)
+            if any(rebalanced.values()):
+                await response_cache.invalidate(TICKETS)
+            for status, count in rebalanced.items():
+                if count:
+                    change_bus.publish("tickets.rebalanced", {"status": status, "rebalanced": count})
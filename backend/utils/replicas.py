@@ -0,0 +1,24 @@
+import time
+from models.database import DB_READ_YOUR_WRITES_SECONDS, PRIMARY_COOKIE, READ_METHODS
+
+class ReadYourWritesMiddleware:
+    # After a successful write, sets a short-lived cookie that keeps the
+    # client's reads on the primary (see get_async_db) until the replicas
+    # have had time to catch up. Only installed when replicas are configured.
+    def __init__(self, app, seconds: float = DB_READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.seconds
+                cookie = f"{PRIMARY_COOKIE}={until:.3f}; Max-Age={int(self.seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,195 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from fastapi import Request, Response
+from models.database import DB_READ_YOUR_WRITES_SECONDS, replicas
+from utils.etag import CACHE_CONTROL, etag_matches
+from utils.instrumentation import route_template
+from utils.metrics import Counter, Gauge
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+# Serialized response bodies for the hot read endpoints, keyed by endpoint,
+# query string and the generation of the data they were built from. Mutation
+# handlers bump the generation after committing, which orphans every entry
+# built before; the backend evicts them as it needs room. A hit costs no SQL
+# and no serialization, and answers If-None-Match from the stored ETag.
+#
+# RESPONSE_CACHE selects the store: "off" (the default) disables caching.
+# "redis" shares entries and generations between workers through
+# RESPONSE_CACHE_REDIS_URL and relies on the server's maxmemory policy for
+# eviction. "memory" is an LRU inside the process, bounded by
+# RESPONSE_CACHE_MAX_BYTES; generations are per process too, so a write in
+# one worker would leave the others serving stale pages, and it refuses to
+# start under more than one. Entries also expire after RESPONSE_CACHE_TTL
+# seconds, as a bound on staleness from writes that bypass the handlers.
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "off").lower()
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "supporthub:responses:")
+
+# Generations. Ticket payloads embed employee and engineer names, so renames
+# and deletions of those bump TICKETS as well.
+TICKETS = "tickets"
+
+cache_lookups = Counter("response_cache_lookups_total", "Response cache lookups by route and result (hit, miss).")
+cache_evictions = Counter("response_cache_evictions_total", "Response cache entries evicted to stay under the memory cap.")
+cache_errors = Counter("response_cache_errors_total", "Response cache backend calls that failed.")
+cache_bytes = Gauge("response_cache_bytes", "Bytes held by the in-process response cache.")
+cache_entries = Gauge("response_cache_entries", "Entries held by the in-process response cache.")
+
+def worker_count() -> int:
+    # uvicorn and gunicorn default to WEB_CONCURRENCY workers, and their
+    # workers see the supervisor's command line, --workers included.
+    count = os.getenv("WEB_CONCURRENCY", "1")
+    args = sys.argv[1:]
+    for index, arg in enumerate(args):
+        if arg in ("--workers", "-w") and index + 1 < len(args):
+            count = args[index + 1]
+        elif arg.startswith("--workers="):
+            count = arg.partition("=")[2]
+    return int(count)
+
+class MemoryBackend:
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl: int = RESPONSE_CACHE_TTL):
+        if worker_count() > 1:
+            raise RuntimeError("RESPONSE_CACHE=memory only works with a single worker; use redis instead")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self.size = 0
+        self.generations: Dict[str, Tuple[int, float]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                self.remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    async def set(self, key: str, value: bytes):
+        # Entries past a quarter of the cap would churn everything else out.
+        if len(value) > self.max_bytes // 4:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.size += len(key) + len(value)
+            while self.size > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                cache_evictions.inc()
+            self.update_gauges()
+
+    def remove(self, key: str):
+        value, _ = self.entries.pop(key)
+        self.size -= len(key) + len(value)
+        self.update_gauges()
+
+    def update_gauges(self):
+        cache_bytes.set(self.size)
+        cache_entries.set(len(self.entries))
+
+    async def generation(self, scope: str) -> Tuple[int, float]:
+        return self.generations.get(scope, (0, 0.0))
+
+    async def bump(self, scope: str):
+        with self.lock:
+            generation, _ = self.generations.get(scope, (0, 0.0))
+            self.generations[scope] = (generation + 1, time.time())
+
+class RedisBackend:
+    def __init__(self, url: str = RESPONSE_CACHE_REDIS_URL, ttl: int = RESPONSE_CACHE_TTL, prefix: str = RESPONSE_CACHE_PREFIX):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE=redis needs the redis package")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes):
+        await self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    async def generation(self, scope: str) -> Tuple[int, float]:
+        generation, bumped_at = await self.client.hmget(f"{self.prefix}generation:{scope}", "generation", "bumped_at")
+        return int(generation or 0), float(bumped_at or 0)
+
+    async def bump(self, scope: str):
+        key = f"{self.prefix}generation:{scope}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "generation", 1)
+            pipe.hset(key, "bumped_at", time.time())
+            await pipe.execute()
+
+BACKENDS = {"memory": MemoryBackend, "redis": RedisBackend}
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    async def lookup(self, request: Request, scope: str) -> Tuple[Optional[Response], Optional[str]]:
+        # Returns the cached response, or None and the key to store the
+        # response under once it is built (None when it must not be stored).
+        if self.backend is None:
+            return None, None
+        try:
+            generation, bumped_at = await self.backend.generation(scope)
+            # Until the replicas have caught up with the last write, a
+            # response built from one could be older than the generation.
+            if replicas and time.time() - bumped_at < DB_READ_YOUR_WRITES_SECONDS:
+                return None, None
+            query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+            key = f"{scope}:{generation}:{request.url.path}?{query}"
+            value = await self.backend.get(key)
+        except Exception as e:
+            cache_errors.inc()
+            print(f"Response cache lookup failed: {e}")
+            return None, None
+
+        route = route_template(request.scope)
+        if value is None:
+            cache_lookups.inc(route=route, result="miss")
+            return None, key
+        cache_lookups.inc(route=route, result="hit")
+        etag, _, body = value.partition(b"\n")
+        headers = {"ETag": etag.decode(), "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers), None
+        return Response(body, media_type="application/json", headers=headers), None
+
+    async def store(self, key: Optional[str], response: Response) -> Response:
+        if key is not None and response.status_code == 200 and "etag" in response.headers:
+            try:
+                await self.backend.set(key, response.headers["etag"].encode() + b"\n" + response.body)
+            except Exception as e:
+                cache_errors.inc()
+                print(f"Response cache store failed: {e}")
+        return response
+
+    async def invalidate(self, *scopes: str):
+        # Call after the commit: a reader that saw the old generation may
+        # still store what it read, but under a key nobody asks for again.
+        if self.backend is None:
+            return
+        for scope in scopes:
+            try:
+                await self.backend.bump(scope)
+            except Exception as e:
+                cache_errors.inc()
+                print(f"Response cache invalidation failed: {e}")
+
+response_cache = ResponseCache(BACKENDS[RESPONSE_CACHE]() if RESPONSE_CACHE in BACKENDS else None)
@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.database import SessionLocal
+from models.spent_refresh_token import SpentRefreshToken
+from models.user import User
+
+# Upper bound on how long a worker keeps accepting access tokens minted before
+# a password or role change made on another worker.
+REVOCATION_REFRESH_SECONDS = int(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+
+class RevocationSet:
+    # Maps user id to the lowest token version still accepted. Only users who
+    # ever revoked their tokens are listed, so the set stays small.
+    def __init__(self):
+        self.min_versions: Dict[int, int] = {}
+
+    def is_revoked(self, user_id: int, token_version: int) -> bool:
+        return token_version < self.min_versions.get(user_id, 0)
+
+    def revoke(self, user_id: int, token_version: int):
+        self.min_versions[user_id] = max(token_version, self.min_versions.get(user_id, 0))
+
+    def load(self, db: Session):
+        rows = db.query(User.id, User.token_version).filter(User.token_version > 0)
+        # Swap in a new dict so readers never see a half-built set.
+        self.min_versions = {user_id: token_version for user_id, token_version in rows}
+
+revoked_tokens = RevocationSet()
+
+async def spend_refresh_token(db, token: str, payload: Dict) -> bool:
+    # Refresh tokens are single use: trading one in records its jti, and the
+    # primary key turns a second use, on any worker, into False. Tokens
+    # minted before they carried a jti are keyed by their hash.
+    jti = payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+    try:
+        await db.execute(insert(SpentRefreshToken).values(
+            jti=jti,
+            user_id=int(payload["sub"]),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]),
+        ))
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+def prune_spent_refresh_tokens(db: Session):
+    # Past its expiry a token fails verification anyway.
+    db.execute(delete(SpentRefreshToken).where(SpentRefreshToken.expires_at < datetime.utcnow()))
+    db.commit()
+
+def refresh_revocations():
+    db = SessionLocal()
+    try:
+        revoked_tokens.load(db)
+        prune_spent_refresh_tokens(db)
+    except Exception as e:
+        print(f"Warning: Could not refresh token revocations: {e}")
+    finally:
+        db.close()
+
+async def refresh_revocations_periodically():
+    while True:
+        await run_in_threadpool(refresh_revocations)
+        await asyncio.sleep(REVOCATION_REFRESH_SECONDS)
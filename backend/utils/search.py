@@ -0,0 +1,253 @@
+import asyncio
+import heapq
+import marshal
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.database import SessionLocal
+from models.ticket import Ticket
+from models.ticket_comment import TicketComment
+from models.ticket_change import TicketChange
+from utils.changes import settle_cutoff, settled_token_select
+from utils.events import change_bus, RESYNC
+
+# Each worker keeps its own index and follows the shared change log, so writes
+# made through any worker become searchable. Change events from this worker
+# wake the sync loop early; SEARCH_SYNC_INTERVAL bounds the lag for the rest.
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "search_index.marshal")
+SEARCH_SYNC_INTERVAL = float(os.getenv("SEARCH_SYNC_INTERVAL", "5"))
+SEARCH_SNAPSHOT_INTERVAL = float(os.getenv("SEARCH_SNAPSHOT_INTERVAL", "300"))
+SEARCH_SYNC_BATCH = 1000
+SNAPSHOT_VERSION = 1
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Title terms count this many times, so a match in the title outranks the
+# same word buried in a long description.
+TITLE_WEIGHT = 3
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def document_terms(title: str, description: str, comments: Iterable[str] = ()) -> Counter:
+    terms = Counter(tokenize(description))
+    for token in tokenize(title):
+        terms[token] += TITLE_WEIGHT
+    for comment in comments:
+        terms.update(tokenize(comment))
+    return terms
+
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # term -> {ticket id: term frequency}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # ticket id -> {term: term frequency}; needed to unindex a ticket.
+        self.documents: Dict[int, Dict[str, int]] = {}
+        self.lengths: Dict[int, int] = {}
+        self.total_length = 0
+        # Change-log id the index is known to be complete up to.
+        self.token = 0
+        self.ready = False
+        self.dirty = False
+
+    def _remove(self, ticket_id: int):
+        terms = self.documents.pop(ticket_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self.postings[term]
+            del posting[ticket_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(ticket_id)
+
+    def _add(self, ticket_id: int, terms: Dict[str, int]):
+        self.documents[ticket_id] = terms
+        length = sum(terms.values())
+        self.lengths[ticket_id] = length
+        self.total_length += length
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[ticket_id] = frequency
+
+    def apply(self, documents: Dict[int, Optional[Counter]], token: Optional[int] = None):
+        # None as a document unindexes the ticket (it was deleted).
+        with self.lock:
+            for ticket_id, terms in documents.items():
+                self._remove(ticket_id)
+                if terms:
+                    self._add(ticket_id, dict(terms))
+            if token is not None:
+                self.token = max(self.token, token)
+            self.dirty = True
+
+    def replace(self, other: "SearchIndex"):
+        with self.lock:
+            self.postings = other.postings
+            self.documents = other.documents
+            self.lengths = other.lengths
+            self.total_length = other.total_length
+            self.token = other.token
+            self.ready = True
+            self.dirty = True
+
+    def search(self, query: str, limit: int, offset: int = 0) -> Tuple[List[Tuple[int, float]], int]:
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+        with self.lock:
+            total_docs = len(self.lengths)
+            if not total_docs or not terms:
+                return [], 0
+            average_length = self.total_length / total_docs
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for ticket_id, frequency in posting.items():
+                    norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[ticket_id] / average_length)
+                    scores[ticket_id] = scores.get(ticket_id, 0.0) + idf * frequency * (BM25_K1 + 1) / norm
+        # Ties go to the newer ticket.
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return ranked[offset:], len(scores)
+
+    def save(self, path: str):
+        # Only the forward index is written; postings are rebuilt on load,
+        # which keeps the file roughly half the size of the in-memory index.
+        with self.lock:
+            data = marshal.dumps((SNAPSHOT_VERSION, self.token, self.documents))
+            self.dirty = False
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                version, token, documents = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+        if version != SNAPSHOT_VERSION:
+            return False
+        fresh = SearchIndex()
+        for ticket_id, terms in documents.items():
+            fresh._add(ticket_id, terms)
+        fresh.token = token
+        self.replace(fresh)
+        self.dirty = False
+        return True
+
+search_index = SearchIndex()
+
+def load_documents(db: Session, ticket_ids: List[int]) -> Dict[int, Optional[Counter]]:
+    comments: Dict[int, List[str]] = {}
+    comment_rows = db.execute(
+        select(TicketComment.ticket_id, TicketComment.comment).where(TicketComment.ticket_id.in_(ticket_ids))
+    )
+    for ticket_id, comment in comment_rows:
+        comments.setdefault(ticket_id, []).append(comment)
+    documents: Dict[int, Optional[Counter]] = dict.fromkeys(ticket_ids)
+    ticket_rows = db.execute(
+        select(Ticket.id, Ticket.title, Ticket.description).where(Ticket.id.in_(ticket_ids))
+    )
+    for ticket_id, title, description in ticket_rows:
+        documents[ticket_id] = document_terms(title, description, comments.get(ticket_id, ()))
+    return documents
+
+def rebuild_index(index: SearchIndex, db: Session):
+    # Read the token first: anything written while we scan is replayed by the
+    # next sync, and re-indexing a ticket is idempotent. Only settled changes
+    # count, as a lower id may still commit after the newest one.
+    fresh = SearchIndex()
+    fresh.token = db.scalar(settled_token_select()) or 0
+    last_id = 0
+    while True:
+        ticket_ids = db.scalars(
+            select(Ticket.id).where(Ticket.id > last_id).order_by(Ticket.id).limit(SEARCH_SYNC_BATCH)
+        ).all()
+        if not ticket_ids:
+            break
+        for ticket_id, terms in load_documents(db, ticket_ids).items():
+            if terms:
+                fresh._add(ticket_id, dict(terms))
+        last_id = ticket_ids[-1]
+    index.replace(fresh)
+
+def sync_index(index: SearchIndex, db: Session):
+    oldest, newest = db.execute(select(func.min(TicketChange.id), func.max(TicketChange.id))).one()
+    if not index.ready or (oldest is not None and index.token + 1 < oldest) or index.token > (newest or 0):
+        # No usable starting point: never built, the log was pruned past us,
+        # or the snapshot belongs to another database.
+        rebuild_index(index, db)
+        return
+
+    cutoff = settle_cutoff()
+    since = index.token
+    settled = True
+    while True:
+        rows = db.execute(
+            select(TicketChange.id, TicketChange.ticket_id, TicketChange.created_at)
+            .where(TicketChange.id > since)
+            .order_by(TicketChange.id)
+            .limit(SEARCH_SYNC_BATCH)
+        ).all()
+        if not rows:
+            break
+        # Unsettled changes are indexed right away, but the token only moves
+        # past settled ones (see utils/changes.py), so they are read again.
+        token = None
+        for row in rows:
+            settled = settled and row.created_at <= cutoff
+            if settled:
+                token = row.id
+        index.apply(load_documents(db, list({row.ticket_id for row in rows})), token)
+        since = rows[-1].id
+
+def run_index_sync(index: SearchIndex = search_index):
+    db = SessionLocal()
+    try:
+        sync_index(index, db)
+    except Exception as e:
+        print(f"Warning: Could not sync search index: {e}")
+    finally:
+        db.close()
+
+def save_search_snapshot(index: SearchIndex = search_index):
+    if not index.ready or not index.dirty:
+        return
+    try:
+        index.save(SEARCH_INDEX_PATH)
+    except OSError as e:
+        print(f"Warning: Could not save search index: {e}")
+
+async def search_index_periodically():
+    subscription = change_bus.subscribe()
+    await run_in_threadpool(search_index.load, SEARCH_INDEX_PATH)
+    last_snapshot = time.monotonic()
+    while True:
+        await run_in_threadpool(run_index_sync)
+        if time.monotonic() - last_snapshot > SEARCH_SNAPSHOT_INTERVAL:
+            await run_in_threadpool(save_search_snapshot)
+            last_snapshot = time.monotonic()
+        try:
+            message = await asyncio.wait_for(subscription.queue.get(), SEARCH_SYNC_INTERVAL)
+        except asyncio.TimeoutError:
+            continue
+        # One sync covers every change already queued.
+        while message is not RESYNC and not subscription.queue.empty():
+            message = subscription.queue.get_nowait()
+        if message is RESYNC:
+            subscription = change_bus.subscribe()
@@ -2,10 +2,15 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import os
+import uuid
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 1440
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", "10080"))
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -15,16 +20,33 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-def create_access_token(data: dict) -> str:
+def user_claims(user) -> dict:
+    return {
+        "sub": str(user.id),
+        "role": "admin" if user.is_admin else "user",
+        "ver": user.token_version,
+    }
+
+def _encode_token(data: dict, token_type: str, expire_minutes: int) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    expire = datetime.utcnow() + timedelta(minutes=expire_minutes)
+    to_encode.update({"exp": expire, "type": token_type})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> dict:
+def create_access_token(data: dict) -> str:
+    return _encode_token(data, ACCESS_TOKEN, ACCESS_TOKEN_EXPIRE_MINUTES)
+
+def create_refresh_token(data: dict) -> str:
+    # The jti tells apart tokens minted for the same user in the same second,
+    # so each can be spent once.
+    return _encode_token({**data, "jti": uuid.uuid4().hex}, REFRESH_TOKEN, REFRESH_TOKEN_EXPIRE_MINUTES)
+
+def verify_token(token: str, token_type: str = ACCESS_TOKEN) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("type") != token_type:
+        return None
+    return payload
\ No newline at end of file
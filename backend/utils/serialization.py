@@ -0,0 +1,24 @@
+from typing import Optional
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+class FastJSONResponse(JSONResponse):
+    # For the payloads the hot endpoints return (str, int, None, naive
+    # datetimes, nested dicts and lists) orjson writes the same bytes as the
+    # default encoder: compact separators, UTF-8 rather than \u escapes and
+    # ISO 8601 datetimes.
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+def json_response(content, response: Optional[Response] = None) -> FastJSONResponse:
+    # Returning a response object skips response_model validation. FastAPI
+    # only copies headers set on the injected Response (ETag, Cache-Control)
+    # onto responses it builds itself, so carry them over here.
+    result = FastJSONResponse(content)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
+
+def dumps(value) -> bytes:
+    return orjson.dumps(value)
@@ -0,0 +1,152 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import String, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.database import advisory_lock, advisory_lock_name, engine, SessionLocal, DB_BACKEND
+from models.employee import Employee
+from models.engineer import Engineer
+from models.ticket import Ticket
+from models.ticket_counter import TicketCounter
+
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "300"))
+
+UNASSIGNED = "unassigned"
+
+Bucket = Tuple[str, str]
+
+def ticket_buckets(ticket, department: Optional[str]) -> List[Bucket]:
+    return [
+        ("ticket", "total"),
+        ("status", ticket.status),
+        ("priority", ticket.priority),
+        ("engineer", str(ticket.engineer_id) if ticket.engineer_id is not None else UNASSIGNED),
+        ("department", department or UNASSIGNED),
+    ]
+
+async def employee_department(db: AsyncSession, employee_id: int) -> Optional[str]:
+    return await db.scalar(select(Employee.department).where(Employee.id == employee_id))
+
+def bucket_deltas(removed: Iterable[Bucket] = (), added: Iterable[Bucket] = ()) -> Counter:
+    deltas = Counter()
+    for bucket in removed:
+        deltas[bucket] -= 1
+    for bucket in added:
+        deltas[bucket] += 1
+    return deltas
+
+def counter_upsert(dimension: str, bucket: str, total: int, increment: bool = True):
+    # Inserts the counter row or, if it exists, adds to (or overwrites) its total.
+    new_total = TicketCounter.total + total if increment else total
+    if DB_BACKEND == "sqlite":
+        stmt = sqlite.insert(TicketCounter).values(dimension=dimension, bucket=bucket, total=total)
+        return stmt.on_conflict_do_update(index_elements=["dimension", "bucket"], set_={"total": new_total})
+    stmt = mysql.insert(TicketCounter).values(dimension=dimension, bucket=bucket, total=total)
+    return stmt.on_duplicate_key_update(total=new_total)
+
+def counter_upserts(deltas: Counter) -> List:
+    # A single multi-row upsert rather than one statement per bucket. Rows are
+    # sorted so concurrent writers lock counter rows in the same order.
+    rows = [
+        {"dimension": dimension, "bucket": bucket, "total": delta}
+        for (dimension, bucket), delta in sorted(deltas.items())
+        if delta
+    ]
+    if not rows:
+        return []
+    if DB_BACKEND == "sqlite":
+        stmt = sqlite.insert(TicketCounter).values(rows)
+        return [stmt.on_conflict_do_update(
+            index_elements=["dimension", "bucket"], set_={"total": TicketCounter.total + stmt.excluded.total}
+        )]
+    stmt = mysql.insert(TicketCounter).values(rows)
+    return [stmt.on_duplicate_key_update(total=TicketCounter.total + stmt.inserted.total)]
+
+async def adjust_counters(db: AsyncSession, removed: Iterable[Bucket] = (), added: Iterable[Bucket] = ()):
+    for stmt in counter_upserts(bucket_deltas(removed, added)):
+        await db.execute(stmt)
+
+async def read_counters(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    counters: Dict[str, Dict[str, int]] = {}
+    result = await db.execute(select(TicketCounter.dimension, TicketCounter.bucket, TicketCounter.total))
+    for row in result:
+        counters.setdefault(row.dimension, {})[row.bucket] = row.total
+    return counters
+
+def counter_snapshot(db: Session) -> Tuple[Dict[Bucket, int], Dict[Bucket, int]]:
+    # The stored counters and the true counts from one statement, so both come
+    # from the same consistent read without locking anything.
+    ticket_total = select(literal("actual"), literal("ticket"), literal("total"), func.count(Ticket.id))
+    employees = select(literal("actual"), literal("entity"), literal("employees"), func.count(Employee.id))
+    engineers = select(literal("actual"), literal("entity"), literal("engineers"), func.count(Engineer.id))
+    statuses = select(literal("actual"), literal("status"), Ticket.status, func.count()).group_by(Ticket.status)
+    priorities = select(literal("actual"), literal("priority"), Ticket.priority, func.count()).group_by(Ticket.priority)
+    assignees = (
+        select(literal("actual"), literal("engineer"), cast(Ticket.engineer_id, String), func.count())
+        .group_by(Ticket.engineer_id)
+    )
+    departments = (
+        select(literal("actual"), literal("department"), Employee.department, func.count())
+        .select_from(Ticket)
+        .join(Employee, Ticket.employee_id == Employee.id)
+        .group_by(Employee.department)
+    )
+    stored_rows = select(literal("stored"), TicketCounter.dimension, TicketCounter.bucket, TicketCounter.total)
+    query = union_all(ticket_total, employees, engineers, statuses, priorities, assignees, departments, stored_rows)
+
+    stored: Dict[Bucket, int] = {}
+    actual: Dict[Bucket, int] = {}
+    for source, dimension, bucket, total in db.execute(query):
+        if source == "stored":
+            stored[(dimension, bucket)] = total
+            continue
+        if dimension in ("engineer", "department"):
+            bucket = bucket or UNASSIGNED
+        actual[(dimension, bucket)] = actual.get((dimension, bucket), 0) + total
+    return stored, actual
+
+def reconcile_counters(db: Session) -> int:
+    # Ticket writers keep adjusting the counters meanwhile, so the drift is
+    # applied as a delta rather than overwriting the totals. Buckets nothing
+    # counts any more are dropped once they are back to zero.
+    stored, actual = counter_snapshot(db)
+    drift = Counter({bucket: total - stored.get(bucket, 0) for bucket, total in actual.items()})
+    for bucket, total in stored.items():
+        if bucket not in actual:
+            drift[bucket] = -total
+    for stmt in counter_upserts(drift):
+        db.execute(stmt)
+    for dimension, bucket in stored.keys() - actual.keys():
+        db.execute(delete(TicketCounter).where(
+            TicketCounter.dimension == dimension,
+            TicketCounter.bucket == bucket,
+            TicketCounter.total == 0,
+        ))
+    db.commit()
+    return sum(1 for delta in drift.values() if delta)
+
+def run_reconciliation():
+    # Every worker runs the loop; one reconciles at a time and the others
+    # skip the round rather than repeat the scans and the correction.
+    with advisory_lock(engine, advisory_lock_name("stats_reconcile"), 0) as acquired:
+        if not acquired:
+            return
+        db = SessionLocal()
+        try:
+            fixed = reconcile_counters(db)
+            if fixed:
+                print(f"Reconciled {fixed} drifted stats counters")
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Could not reconcile stats counters: {e}")
+        finally:
+            db.close()
+
+async def reconcile_periodically():
+    while True:
+        await run_in_threadpool(run_reconciliation)
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
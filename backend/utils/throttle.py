@@ -0,0 +1,48 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+# Failed logins are counted per username in a fixed window. Once a username
+# reaches LOGIN_MAX_FAILURES it is rejected outright until the window ends, so
+# a brute-force run costs no bcrypt work. Entries are capped so a spray of
+# made-up usernames cannot grow the table without bound.
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "5"))
+LOGIN_FAILURE_WINDOW = float(os.getenv("LOGIN_FAILURE_WINDOW", "300"))
+LOGIN_THROTTLE_ENTRIES = int(os.getenv("LOGIN_THROTTLE_ENTRIES", "100000"))
+
+class LoginThrottle:
+    def __init__(self, max_failures: int = LOGIN_MAX_FAILURES, window: float = LOGIN_FAILURE_WINDOW, max_entries: int = LOGIN_THROTTLE_ENTRIES):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_entries = max_entries
+        # username -> (failure count, window start), least recently failed first.
+        self.failures: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    def retry_after(self, username: str) -> float:
+        # Seconds until this username may try again; 0 when it is not blocked.
+        entry = self.failures.get(username.lower())
+        if entry is None:
+            return 0
+        count, started = entry
+        remaining = started + self.window - time.monotonic()
+        if remaining <= 0:
+            del self.failures[username.lower()]
+            return 0
+        return remaining if count >= self.max_failures else 0
+
+    def record_failure(self, username: str):
+        key = username.lower()
+        now = time.monotonic()
+        count, started = self.failures.get(key, (0, now))
+        if started + self.window <= now:
+            count, started = 0, now
+        self.failures[key] = (count + 1, started)
+        self.failures.move_to_end(key)
+        while len(self.failures) > self.max_entries:
+            self.failures.popitem(last=False)
+
+    def reset(self, username: str):
+        self.failures.pop(username.lower(), None)
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+import os
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+from models.database import SessionLocal, DB_BACKEND
+from models.employee import Employee
+from models.engineer import Engineer
+from models.ticket import Ticket
+from models.ticket_change import TicketChange
+from models.ticket_transition import TicketTransition
+from schemas.ticket import TicketCreate
+from utils.changes import UPSERT
+from utils.ranking import time_rank
+from utils.stats import ticket_buckets, bucket_deltas, counter_upserts
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Only the first errors are reported, so a file that is wrong on every line
+# still produces a bounded response.
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+CSV = "csv"
+NDJSON = "ndjson"
+IMPORT_FORMATS = (CSV, NDJSON)
+
+class RowError(ValueError):
+    pass
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return NDJSON
+    if name.endswith(".csv") or content_type == "text/csv":
+        return CSV
+    return None
+
+def read_records(stream: BinaryIO, file_format: str) -> Iterator[Tuple[int, Dict]]:
+    # Yields (line number, record) one at a time; nothing is buffered beyond
+    # the current line. Unparseable lines yield a RowError instead of a dict.
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == CSV:
+        reader = csv.DictReader(text)
+        for record in reader:
+            # Empty cells fall back to the schema defaults; extra cells are dropped.
+            yield reader.line_num, {key: value for key, value in record.items() if key is not None and value not in ("", None)}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, RowError("Invalid JSON")
+                continue
+            if not isinstance(record, dict):
+                yield line_number, RowError("Expected a JSON object")
+                continue
+            yield line_number, record
+
+class TicketImporter:
+    def __init__(self, db: Session, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.batch: List[TicketCreate] = []
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        # Employees and engineers are resolved in memory: the lookups grow with
+        # the directory, not with the file being imported.
+        self.employee_ids: Dict[str, int] = {}
+        self.departments: Dict[int, Optional[str]] = {}
+        for id, email, department in db.query(Employee.id, Employee.email, Employee.department):
+            self.employee_ids[email.lower()] = id
+            self.departments[id] = department
+        self.engineer_ids: Set[int] = {id for (id,) in db.query(Engineer.id)}
+        self.id_step = 1 if DB_BACKEND == "sqlite" else db.scalar(text("SELECT @@auto_increment_increment"))
+
+    def build_ticket(self, record: Dict) -> TicketCreate:
+        email = record.pop("employee_email", None)
+        if email is not None and "employee_id" not in record:
+            employee_id = self.employee_ids.get(str(email).strip().lower())
+            if employee_id is None:
+                raise RowError(f"Unknown employee email: {email}")
+            record["employee_id"] = employee_id
+        try:
+            ticket = TicketCreate(**record)
+        except ValidationError as e:
+            raise RowError("; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+        if ticket.employee_id not in self.departments:
+            raise RowError(f"Unknown employee id: {ticket.employee_id}")
+        if ticket.engineer_id is not None and ticket.engineer_id not in self.engineer_ids:
+            raise RowError(f"Unknown engineer id: {ticket.engineer_id}")
+        return ticket
+
+    def add(self, row: int, record):
+        try:
+            if isinstance(record, RowError):
+                raise record
+            self.batch.append(self.build_ticket(record))
+        except RowError as e:
+            self.fail(row, str(e))
+            return
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def fail(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def flush(self):
+        if not self.batch:
+            return
+        db = self.db
+        # Imported tickets join the end of their columns, in file order.
+        rows = [{**ticket.dict(), "board_rank": time_rank()} for ticket in self.batch]
+        if DB_BACKEND == "sqlite":
+            # executemany with RETURNING, batched by the driver.
+            ticket_ids = db.scalars(insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True), rows).all()
+        else:
+            # MySQL has no RETURNING. A single multi-row INSERT ... VALUES is a
+            # "simple insert" to InnoDB, which reserves all its ids at once
+            # under every innodb_autoinc_lock_mode, so they run consecutively
+            # from LAST_INSERT_ID() in steps of auto_increment_increment.
+            first_id = db.execute(insert(Ticket).values(rows)).lastrowid
+            ticket_ids = list(range(first_id, first_id + len(rows) * self.id_step, self.id_step))
+        db.execute(insert(TicketChange), [{"ticket_id": ticket_id, "operation": UPSERT} for ticket_id in ticket_ids])
+        db.execute(insert(TicketTransition).from_select(
+            ["ticket_id", "to_status", "to_engineer_id", "created_at"],
+            select(Ticket.id, Ticket.status, Ticket.engineer_id, Ticket.created_at).where(Ticket.id.in_(ticket_ids)),
+        ))
+        added = [
+            bucket
+            for ticket in self.batch
+            for bucket in ticket_buckets(ticket, self.departments[ticket.employee_id])
+        ]
+        for stmt in counter_upserts(bucket_deltas(added=added)):
+            db.execute(stmt)
+        db.commit()
+        self.imported += len(self.batch)
+        self.batch = []
+
+    def run(self, stream: BinaryIO, file_format: str) -> Dict:
+        row = 0
+        try:
+            for row, record in read_records(stream, file_format):
+                self.add(row, record)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # The stream cannot be resynchronised after this; keep what was
+            # read so far and report where it stopped.
+            self.fail(row + 1, f"Could not parse file: {e}")
+        self.flush()
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+def run_import(stream: BinaryIO, file_format: str, batch_size: int = IMPORT_BATCH_SIZE) -> Dict:
+    db = SessionLocal()
+    try:
+        return TicketImporter(db, batch_size).run(stream, file_format)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,31 @@
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models.ticket_transition import TicketTransition
+from utils.assignment import TicketState
+
+# Transitions are written in the same transaction as the change they describe,
+# from the (engineer_id, status, priority) states the handlers already take for
+# the workload balancer. Priority-only edits are not transitions.
+
+def transition_values(ticket_id: int, before: Optional[TicketState], after: TicketState) -> Optional[Dict]:
+    if before is not None and before[:2] == after[:2]:
+        return None
+    return {
+        "ticket_id": ticket_id,
+        "from_status": before[1] if before is not None else None,
+        "to_status": after[1],
+        "from_engineer_id": before[0] if before is not None else None,
+        "to_engineer_id": after[0],
+    }
+
+def record_transition(db: Session, ticket_id: int, before: Optional[TicketState], after: TicketState):
+    values = transition_values(ticket_id, before, after)
+    if values is not None:
+        db.add(TicketTransition(**values))
+
+async def record_transitions(db, changes: Iterable[Tuple[int, Optional[TicketState], TicketState]]):
+    # One executemany for a batch, like record_changes.
+    rows = [values for values in (transition_values(*change) for change in changes) if values is not None]
+    if rows:
+        await db.execute(insert(TicketTransition), rows)
@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { DragDropContext, Droppable, Draggable, DropResult } from 'react-beautiful-dnd';
-import { FiUser, FiUserCheck } from 'react-icons/fi';
+import { FiUser, FiUserCheck, FiMessageSquare } from 'react-icons/fi';
 import apiClient from '@/lib/api';
 import styles from '@/styles/KanbanBoard.module.css';
 
@@ -14,12 +14,19 @@ interface Ticket {
   engineer_id?: number;
   employee?: { name: string };
   engineer?: { name: string };
+  comment_count?: number;
+  last_comment_at?: string | null;
+  version?: number;
 }
 
 interface KanbanData {
   [key: string]: Ticket[];
 }
 
+interface ColumnMeta {
+  [key: string]: number | string | null;
+}
+
 const STATUSES = [
   { key: 'open', label: 'Open' },
   { key: 'in_progress', label: 'In Progress' },
@@ -34,20 +41,159 @@ const KanbanBoard: React.FC = () => {
     resolved: [],
     closed: [],
   });
+  const [totals, setTotals] = useState<ColumnMeta>({});
+  const [nextCursors, setNextCursors] = useState<ColumnMeta>({});
+  const kanbanRef = useRef<KanbanData>(kanbanData);
+  kanbanRef.current = kanbanData;
+  const changeTokenRef = useRef<number | null>(null);
+  const settleTimerRef = useRef<number | null>(null);
 
   useEffect(() => {
     fetchKanbanData();
   }, []);
 
+  useEffect(() => {
+    let source: EventSource | null = null;
+
+    const connect = () => {
+      source = new EventSource(`${apiClient.defaults.baseURL}/api/tickets/stream`);
+      source.onmessage = (event) => {
+        const change = JSON.parse(event.data);
+        if (change.type === 'tickets.imported') {
+          syncChanges();
+        } else if (change.type === 'tickets.rebalanced') {
+          // Load-more cursors carry the old card ranks.
+          fetchKanbanData();
+        } else if (change.type === 'comment.created') {
+          applyComment(change.ticket_id, change.comment.created_at);
+        } else {
+          applyChange(change);
+        }
+      };
+      source.addEventListener('resync', () => {
+        source?.close();
+        connect();
+        syncChanges();
+      });
+    };
+
+    connect();
+    return () => {
+      source?.close();
+      if (settleTimerRef.current !== null) window.clearTimeout(settleTimerRef.current);
+    };
+  }, []);
+
+  const applyChange = (change: { type: string; ticket?: Ticket; ticket_id?: number }) => {
+    if (change.type !== 'ticket.created' && change.type !== 'ticket.updated' && change.type !== 'ticket.deleted') {
+      return;
+    }
+    const current = kanbanRef.current;
+    const ticketId = change.ticket ? change.ticket.id : change.ticket_id;
+    const previousStatus = Object.keys(current).find(key => current[key].some(t => t.id === ticketId)) || null;
+    const newStatus = change.ticket ? change.ticket.status : null;
+
+    const next: KanbanData = { ...current };
+    if (previousStatus) {
+      next[previousStatus] = current[previousStatus]
+        .map(t => (t.id === ticketId && change.ticket ? change.ticket : t))
+        .filter(t => t.id !== ticketId || previousStatus === newStatus);
+    }
+    if (change.ticket && newStatus && newStatus !== previousStatus && next[newStatus]) {
+      next[newStatus] = [...next[newStatus], change.ticket];
+    }
+    kanbanRef.current = next;
+    setKanbanData(next);
+
+    if (previousStatus !== newStatus) {
+      setTotals(prev => {
+        const updated = { ...prev };
+        if (previousStatus) updated[previousStatus] = Number(updated[previousStatus] || 0) - 1;
+        if (newStatus) updated[newStatus] = Number(updated[newStatus] || 0) + 1;
+        return updated;
+      });
+    }
+  };
+
+  const applyComment = (ticketId: number, createdAt: string) => {
+    const current = kanbanRef.current;
+    const status = Object.keys(current).find(key => current[key].some(t => t.id === ticketId));
+    if (!status) return;
+    const next: KanbanData = {
+      ...current,
+      [status]: current[status].map(t =>
+        t.id === ticketId ? { ...t, comment_count: (t.comment_count || 0) + 1, last_comment_at: createdAt } : t
+      ),
+    };
+    kanbanRef.current = next;
+    setKanbanData(next);
+  };
+
   const fetchKanbanData = async () => {
     try {
       const response = await apiClient.get('/api/tickets/kanban');
-      setKanbanData(response.data);
+      const {
+        totals: columnTotals,
+        next_cursors: columnCursors,
+        change_token: changeToken,
+        ...columns
+      } = response.data;
+      changeTokenRef.current = changeToken;
+      setKanbanData(columns);
+      setTotals(columnTotals);
+      setNextCursors(columnCursors);
     } catch (error) {
       console.error('Error fetching kanban data:', error);
     }
   };
 
+  const syncChanges = async () => {
+    if (changeTokenRef.current === null) {
+      fetchKanbanData();
+      return;
+    }
+
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const since = changeTokenRef.current;
+        const response = await apiClient.get('/api/tickets/changes', { params: { since } });
+        if (response.data.reset) {
+          fetchKanbanData();
+          return;
+        }
+        response.data.changes.forEach((ticket: Ticket) => applyChange({ type: 'ticket.updated', ticket }));
+        response.data.deleted.forEach((ticketId: number) => applyChange({ type: 'ticket.deleted', ticket_id: ticketId }));
+        changeTokenRef.current = response.data.token;
+        // Changes still settling come back with the same token; fetch them
+        // once they have settled rather than re-reading them now.
+        hasMore = response.data.has_more && response.data.token !== since;
+        if (!hasMore && response.data.retry_after != null && settleTimerRef.current === null) {
+          settleTimerRef.current = window.setTimeout(() => {
+            settleTimerRef.current = null;
+            syncChanges();
+          }, response.data.retry_after * 1000);
+        }
+      }
+    } catch (error) {
+      console.error('Error syncing ticket changes:', error);
+      fetchKanbanData();
+    }
+  };
+
+  const loadMore = async (status: string) => {
+    const cursor = nextCursors[status];
+    if (!cursor) return;
+
+    try {
+      const response = await apiClient.get(`/api/tickets/kanban/${status}`, { params: { cursor } });
+      setKanbanData(prev => ({ ...prev, [status]: [...(prev[status] || []), ...response.data.items] }));
+      setNextCursors(prev => ({ ...prev, [status]: response.data.next_cursor }));
+    } catch (error) {
+      console.error('Error loading more tickets:', error);
+    }
+  };
+
   const handleDragEnd = async (result: DropResult) => {
     const { source, destination, draggableId } = result;
 
@@ -71,13 +217,31 @@ const KanbanBoard: React.FC = () => {
       [source.droppableId]: newSourceColumn,
       [destination.droppableId]: newDestColumn,
     });
+    if (source.droppableId !== destination.droppableId) {
+      setTotals(prev => ({
+        ...prev,
+        [source.droppableId]: Number(prev[source.droppableId] || 0) - 1,
+        [destination.droppableId]: Number(prev[destination.droppableId] || 0) + 1,
+      }));
+    }
 
+    // The server places the card between its new neighbours and rejects the
+    // move with 409 if someone else changed the ticket since we loaded it.
     try {
-      await apiClient.patch(`/api/tickets/${ticket.id}/status`, {
+      const response = await apiClient.patch(`/api/tickets/${ticket.id}/status`, {
         status: destination.droppableId,
+        version: ticket.version,
+        before_id: newDestColumn[destination.index - 1]?.id,
+        after_id: newDestColumn[destination.index + 1]?.id,
       });
-    } catch (error) {
-      console.error('Error updating ticket status:', error);
+      setKanbanData(prev => ({
+        ...prev,
+        [destination.droppableId]: prev[destination.droppableId].map(t => (t.id === ticket.id ? response.data : t)),
+      }));
+    } catch (error: any) {
+      if (error.response?.status !== 409) {
+        console.error('Error updating ticket status:', error);
+      }
       fetchKanbanData();
     }
   };
@@ -112,7 +276,7 @@ const KanbanBoard: React.FC = () => {
           <div key={status.key} className={styles.column}>
             <div className={styles.columnHeader}>
               <span className={styles.columnTitle}>{status.label}</span>
-              <span className={styles.columnCount}>{kanbanData[status.key]?.length || 0}</span>
+              <span className={styles.columnCount}>{totals[status.key] ?? kanbanData[status.key]?.length ?? 0}</span>
             </div>
             <Droppable droppableId={status.key}>
               {(provided) => (
@@ -144,6 +308,15 @@ const KanbanBoard: React.FC = () => {
                               <span>{ticket.employee?.name || 'Unknown'}</span>
                             </div>
                             <div className={styles.ticketEngineer}>
+                              {ticket.comment_count ? (
+                                <span
+                                  className={styles.commentBadge}
+                                  title={ticket.last_comment_at ? `Last comment ${new Date(ticket.last_comment_at + 'Z').toLocaleString()}` : undefined}
+                                >
+                                  <FiMessageSquare size={12} />
+                                  {ticket.comment_count}
+                                </span>
+                              ) : null}
                               {ticket.engineer ? (
                                 <>
                                   <div className={styles.engineerAvatar}>
@@ -160,6 +333,11 @@ const KanbanBoard: React.FC = () => {
                     </Draggable>
                   ))}
                   {provided.placeholder}
+                  {nextCursors[status.key] && (
+                    <button className={styles.loadMoreButton} onClick={() => loadMore(status.key)}>
+                      Load more
+                    </button>
+                  )}
                 </div>
               )}
             </Droppable>
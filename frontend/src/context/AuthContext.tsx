@@ -44,6 +44,7 @@ export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
     } catch (error) {
       console.error('Failed to fetch user:', error);
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
       setToken(null);
     } finally {
       setLoading(false);
@@ -52,9 +53,10 @@ export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
 
   const login = async (username: string, password: string) => {
     const response = await apiClient.post('/api/auth/login', { username, password });
-    const { access_token } = response.data;
+    const { access_token, refresh_token } = response.data;
     
     localStorage.setItem('token', access_token);
+    localStorage.setItem('refresh_token', refresh_token);
     setToken(access_token);
     
     await fetchCurrentUser(access_token);
@@ -63,6 +65,7 @@ export const AuthProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
 
   const logout = () => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     setToken(null);
     setUser(null);
     router.push('/login');
@@ -17,4 +17,41 @@ apiClient.interceptors.request.use((config) => {
   return config;
 });
 
+// Access tokens are short-lived; on a 401 trade the refresh token for a new
+// pair once and replay the request. Concurrent failures share one refresh.
+let refreshing: Promise<string> | null = null;
+
+const refreshAccessToken = async (): Promise<string> => {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    throw new Error('No refresh token');
+  }
+  const response = await axios.post(`${API_BASE_URL}/api/auth/refresh`, { refresh_token: refreshToken });
+  localStorage.setItem('token', response.data.access_token);
+  localStorage.setItem('refresh_token', response.data.refresh_token);
+  return response.data.access_token;
+};
+
+apiClient.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status !== 401 || !original || original._retry || original.url?.includes('/api/auth/login') || original.url?.includes('/api/auth/refresh')) {
+      return Promise.reject(error);
+    }
+    original._retry = true;
+    try {
+      refreshing = refreshing || refreshAccessToken();
+      await refreshing;
+    } catch (refreshError) {
+      localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
+      return Promise.reject(error);
+    } finally {
+      refreshing = null;
+    }
+    return apiClient(original);
+  }
+);
+
 export default apiClient;
\ No newline at end of file
@@ -30,6 +30,7 @@ const Dashboard: React.FC = () => {
     total_employees: 0,
     avg_resolution_time: '0h',
   });
+  const [priorityCounts, setPriorityCounts] = useState<{ [key: string]: number }>({});
   const [isTicketModalOpen, setIsTicketModalOpen] = useState(false);
 
   useEffect(() => {
@@ -38,29 +39,19 @@ const Dashboard: React.FC = () => {
 
   const fetchStats = async () => {
     try {
-      const [ticketsRes, engineersRes, employeesRes] = await Promise.all([
-        apiClient.get('/api/tickets'),
-        apiClient.get('/api/engineers'),
-        apiClient.get('/api/employees'),
-      ]);
-
-      const tickets = ticketsRes.data;
-      const engineers = engineersRes.data;
-      const employees = employeesRes.data;
-
-      const openTickets = tickets.filter((t: any) => t.status === 'open').length;
-      const inProgressTickets = tickets.filter((t: any) => t.status === 'in_progress').length;
-      const resolvedTickets = tickets.filter((t: any) => t.status === 'resolved').length;
+      const response = await apiClient.get('/api/stats');
+      const data = response.data;
 
       setStats({
-        total_tickets: tickets.length,
-        open_tickets: openTickets,
-        in_progress_tickets: inProgressTickets,
-        resolved_tickets: resolvedTickets,
-        total_engineers: engineers.length,
-        total_employees: employees.length,
+        total_tickets: data.total_tickets,
+        open_tickets: data.by_status.open || 0,
+        in_progress_tickets: data.by_status.in_progress || 0,
+        resolved_tickets: data.by_status.resolved || 0,
+        total_engineers: data.total_engineers,
+        total_employees: data.total_employees,
         avg_resolution_time: '2.5h',
       });
+      setPriorityCounts(data.by_priority);
     } catch (error) {
       console.error('Error fetching stats:', error);
     }
@@ -73,9 +64,9 @@ const Dashboard: React.FC = () => {
   ];
 
   const priorityData = [
-    { name: 'High', value: 12, color: '#EF4444' },
-    { name: 'Medium', value: 24, color: '#F59E0B' },
-    { name: 'Low', value: 18, color: '#10B981' },
+    { name: 'High', value: priorityCounts.high || 0, color: '#EF4444' },
+    { name: 'Medium', value: priorityCounts.medium || 0, color: '#F59E0B' },
+    { name: 'Low', value: priorityCounts.low || 0, color: '#10B981' },
   ];
 
   return (